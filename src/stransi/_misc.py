@@ -3,7 +3,23 @@
 from __future__ import annotations
 
 import re
-from typing import Iterable, Pattern, Text
+import threading
+import unicodedata
+import weakref
+from functools import lru_cache, update_wrapper
+from typing import (
+    Callable,
+    Generic,
+    Iterable,
+    NamedTuple,
+    Pattern,
+    Text,
+    Tuple,
+    TypeVar,
+)
+
+K = TypeVar("K")
+V = TypeVar("V")
 
 
 def _isplit(
@@ -43,6 +59,146 @@ def _isplit(
     yield text[prev_end:]
 
 
+class CacheInfo(NamedTuple):
+    """Statistics of a cache, like those of `functools.lru_cache`."""
+
+    hits: int
+    misses: int
+    maxsize: int
+    currsize: int
+
+
+class _Holder(Generic[K, V]):
+    """The cache of a thread, in an object that can be weakly referenced."""
+
+    __slots__ = ("cached", "__weakref__")
+
+    def __init__(self, cached: Callable[[K], V]) -> None:
+        """Hold a cached function."""
+        self.cached = cached
+
+
+class _ThreadCache(Generic[K, V]):
+    """
+    A least-recently-used cache of a function, with a separate cache per thread.
+
+    Threads never share (and never wait for) a cache, which keeps them from
+    contending for it when running without the global interpreter lock. The
+    statistics of the caches of all live threads are merged by `cache_info()`.
+
+    Examples
+    --------
+    >>> square = _ThreadCache(lambda x: x * x, maxsize=8)
+    >>> square(3), square(3), square.cached()(4)
+    (9, 9, 16)
+    >>> square.cache_info()
+    CacheInfo(hits=1, misses=2, maxsize=8, currsize=2)
+    """
+
+    def __init__(self, function: Callable[[K], V], maxsize: int) -> None:
+        """Cache a function of a single argument."""
+        update_wrapper(self, function)
+        self.function = function
+        self.maxsize = maxsize
+        self._local = threading.local()
+        # Caches of all threads, which go away along with their threads
+        self._holders: weakref.WeakSet[_Holder[K, V]] = weakref.WeakSet()
+        self._lock = threading.Lock()
+
+    def __call__(self, key: K) -> V:
+        """Return the (cached) result of the function."""
+        return self.cached()(key)
+
+    def cached(self) -> Callable[[K], V]:
+        """Return the cached function of this thread, e.g., for tight loops."""
+        holder = getattr(self._local, "holder", None)
+        if holder is None:
+            holder = _Holder(lru_cache(self.maxsize)(self.function))
+            self._local.holder = holder
+            with self._lock:
+                self._holders.add(holder)
+        return holder.cached
+
+    def cache_info(self) -> CacheInfo:
+        """Return the statistics of the caches of all threads put together."""
+        with self._lock:
+            infos = [holder.cached.cache_info() for holder in self._holders]
+        return CacheInfo(
+            sum(info.hits for info in infos),
+            sum(info.misses for info in infos),
+            self.maxsize,
+            sum(info.currsize for info in infos),
+        )
+
+    def cache_clear(self) -> None:
+        """Clear the caches of all threads."""
+        with self._lock:
+            for holder in self._holders:
+                holder.cached.cache_clear()
+
+
+def _per_thread_cache(maxsize: int) -> Callable[[Callable[[K], V]], _ThreadCache[K, V]]:
+    """Decorate a function with a `_ThreadCache`."""
+    return lambda function: _ThreadCache(function, maxsize)
+
+
+@_per_thread_cache(maxsize=4096)
+def _char_width(char: Text) -> int:
+    r"""
+    Return the number of terminal columns a single character occupies.
+
+    Examples
+    --------
+    >>> _char_width("a"), _char_width("中")
+    (1, 2)
+    >>> _char_width("\N{COMBINING ACUTE ACCENT}"), _char_width("\t")
+    (0, 0)
+    """
+    if unicodedata.combining(char) or unicodedata.category(char) in {"Cc", "Cf"}:
+        return 0
+    if unicodedata.east_asian_width(char) in {"W", "F"}:
+        return 2
+    return 1
+
+
+def _width(text: Text) -> int:
+    """
+    Return the number of terminal columns a text occupies.
+
+    Examples
+    --------
+    >>> _width("Hello"), _width("中文")
+    (5, 4)
+    """
+    if text.isascii() and text.isprintable():
+        return len(text)
+    return sum(map(_char_width.cached(), text))
+
+
+def _fit(text: Text, start: int, columns: int) -> Tuple[int, int]:
+    """
+    Return how far a text fits in the given number of columns.
+
+    This returns the index where the fitting part of `text[start:]` ends and
+    the number of columns it occupies.
+
+    Examples
+    --------
+    >>> _fit("Hello", 1, 3)
+    (4, 3)
+    >>> _fit("中文", 0, 3)
+    (1, 2)
+    """
+    used = 0
+    width = _char_width.cached()
+    for index in range(start, len(text)):
+        char_width = width(text[index])
+        if used + char_width > columns:
+            return index, used
+        used += char_width
+    return len(text), used
+
+
 class _CustomText(Text):
     """A custom string type for subclassing."""
 
@@ -3,11 +3,66 @@
 from __future__ import annotations
 
 import re
-from typing import Iterable, Text
+from typing import Iterable, List, Text
 
-from ._misc import _CustomText, _isplit
+from ._misc import _CustomText, _fit, _isplit, _width
+from .attribute import Attribute, SetAttribute
+from .encode import encode, issgr
 from .escape import Escape, isescape
 from .instruction import Instruction
+from .style import DEFAULT
+from .unsupported import Unsupported
+
+
+def _isunsupportedsgr(instruction: Instruction) -> bool:
+    """Return True if the instruction is a SGR parameter we don't support."""
+    return isinstance(instruction, Unsupported) and instruction.token.kind == "m"
+
+
+class _ActiveStyle:
+    r"""
+    The active style, along with the unsupported SGR parameters in effect.
+
+    `Style` ignores the SGR parameters that aren't supported (e.g.,
+    strikethrough), but they still have to be closed and re-opened along with
+    it. They are kept (in order) until the next reset.
+
+    Examples
+    --------
+    >>> active = _ActiveStyle()
+    >>> for instruction in Ansi("\x1b[1;9m").instructions():
+    ...     active.apply(instruction)
+    >>> active.open(), active.close()
+    ('\x1b[1;9m', '\x1b[m')
+    """
+
+    def __init__(self) -> None:
+        """Start in the default style."""
+        self.style = DEFAULT
+        self.unsupported: List[Instruction] = []
+
+    def __bool__(self) -> bool:
+        """Return True if this is not the default style."""
+        return bool(self.style or self.unsupported)
+
+    def apply(self, instruction: Instruction) -> None:
+        """Apply an instruction."""
+        if _isunsupportedsgr(instruction):
+            self.unsupported.append(instruction)
+        elif (
+            isinstance(instruction, SetAttribute)
+            and instruction.attribute is Attribute.NORMAL
+        ):
+            self.unsupported = []
+        self.style = self.style.apply(instruction)
+
+    def open(self) -> Text:
+        """Return the escape sequence that sets this style from the default one."""
+        return encode([*self.style.instructions(), *self.unsupported])
+
+    def close(self) -> Text:
+        """Return the escape sequence that goes back to the default style."""
+        return encode([SetAttribute(Attribute.NORMAL)]) if self else ""
 
 
 class Ansi(_CustomText):
@@ -48,3 +103,133 @@ class Ansi(_CustomText):
                 yield escape
                 continue
             yield from escape.instructions()
+
+    def wrap(self, width: int) -> List[Ansi]:  # noqa: C901
+        r"""
+        Break the string into lines that fit the given display width.
+
+        Existing line breaks are kept. The active style is closed at the end of
+        each line and re-opened right before the next visible text, so every
+        line can be printed on its own.
+
+        Examples
+        --------
+        >>> Ansi("\x1b[1mHello\x1b[m, world!").wrap(4)
+        [Ansi('\x1b[1mHell\x1b[m'), Ansi('\x1b[1mo\x1b[m, w'), Ansi('orld'), Ansi('!')]
+        """
+        if width < 1:
+            raise ValueError(f"width must be positive, got {width}")
+
+        lines: List[Ansi] = []
+        line: List[Text] = []
+        column = 0
+        active = _ActiveStyle()
+        # Whether the active style still has to be re-opened in this line
+        pending = False
+
+        def break_line() -> None:
+            nonlocal line, column, pending
+            if not pending:
+                line.append(active.close())
+            lines.append(Ansi("".join(line)))
+            line = []
+            column = 0
+            pending = bool(active)
+
+        for piece in self.escapes():
+            if isinstance(piece, Escape):
+                instructions = list(piece.instructions())
+                styling = all(issgr(i) or _isunsupportedsgr(i) for i in instructions)
+                if not (pending and styling):
+                    if pending:
+                        line.append(active.open())
+                        pending = False
+                    line.append(piece)
+                # Style changes are folded into the pending style otherwise.
+                for instruction in instructions:
+                    active.apply(instruction)
+                continue
+
+            for index, segment in enumerate(piece.split("\n")):
+                if index:
+                    break_line()
+                simple = segment.isascii() and segment.isprintable()
+                start = 0
+                while start < len(segment):
+                    if simple:
+                        # A wide character may have left the line overflowing.
+                        end = max(start, min(len(segment), start + width - column))
+                        used = end - start
+                    else:
+                        end, used = _fit(segment, start, width - column)
+                    if end == start:
+                        if column:
+                            break_line()
+                            continue
+                        # A single character wider than the whole line
+                        end, used = start + 1, _width(segment[start])
+
+                    if pending:
+                        line.append(active.open())
+                        pending = False
+                    line.append(segment[start:end])
+                    column += used
+                    start = end
+
+        if not pending:
+            line.append(active.close())
+        lines.append(Ansi("".join(line)))
+        return lines
+
+    def truncate(  # noqa: C901
+        self, width: int, ellipsis: Text = "\N{HORIZONTAL ELLIPSIS}"
+    ) -> Ansi:
+        r"""
+        Shorten the string to the given display width.
+
+        If the string is too wide, it is cut so that the ellipsis fits at the
+        end, and the active style is closed afterwards. The string is treated
+        as a single line.
+
+        Examples
+        --------
+        >>> Ansi("\x1b[31mHello\x1b[m, world!").truncate(4)
+        Ansi('\x1b[31mHel…\x1b[m')
+        >>> Ansi("\x1b[31mHello\x1b[m").truncate(5)
+        Ansi('\x1b[31mHello\x1b[m')
+        """
+        ellipsis_width = _width(ellipsis)
+        if ellipsis_width > width:
+            raise ValueError(f"ellipsis {ellipsis!r} is wider than {width} columns")
+        limit = width - ellipsis_width
+
+        pieces: List[Text] = []
+        column = 0
+        active = _ActiveStyle()
+        # What closes the style where the ellipsis goes, once we know it
+        closing: Text | None = None
+        for piece in self.escapes():
+            if isinstance(piece, Escape):
+                if closing is None:
+                    pieces.append(piece)
+                    for instruction in piece.instructions():
+                        active.apply(instruction)
+                continue
+
+            if closing is None:
+                end, used = _fit(piece, 0, limit - column)
+                column += used
+                if end == len(piece):
+                    pieces.append(piece)
+                    continue
+                pieces.append(piece[:end])
+                closing = active.close()
+                piece = piece[end:]
+
+            column += _width(piece)
+            if column > width:
+                pieces.append(ellipsis)
+                pieces.append(closing)
+                return Ansi("".join(pieces))
+
+        return self
@@ -0,0 +1,313 @@
+"""A persistent on-disk cache of parsed ANSI strings."""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Text, Tuple, Union
+
+import ochre
+
+from . import __version__
+from .ansi import Ansi
+from .attribute import Attribute, SetAttribute
+from .clear import Clear, SetClear
+from .color import ColorRole, SetColor
+from .cursor import CursorMove, SetCursor
+from .escape import Escape
+from .instruction import Instruction
+from .token import Token
+from .unsupported import Unsupported
+
+PathLike = Union[Text, "os.PathLike[Text]"]
+
+# Item tags of the binary format
+_TEXT = 0
+_ATTRIBUTE = 1
+_COLOR = 2
+_CURSOR = 3
+_CLEAR = 4
+_UNSUPPORTED = 5
+
+# Color kinds of the binary format
+_DEFAULT_COLOR = 0
+_ANSI256_COLOR = 1
+_RGB_COLOR = 2
+
+_ROLES = list(ColorRole)
+
+
+def _write_int(buffer: bytearray, value: int) -> None:
+    """Append a signed integer of any size as a (zigzag) variable-length int."""
+    value = value << 1 if value >= 0 else ((-value) << 1) - 1
+    while value > 0x7F:
+        buffer.append(value & 0x7F | 0x80)
+        value >>= 7
+    buffer.append(value)
+
+
+def _read_int(data: bytes, pos: int) -> Tuple[int, int]:
+    """Read a variable-length int, returning it and the next position."""
+    value = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        shift += 7
+        if byte < 0x80:
+            break
+    value = value >> 1 if not value & 1 else -((value + 1) >> 1)
+    return value, pos
+
+
+def _dump(text: Text) -> Tuple[bytes, List[Instruction | Text]]:  # noqa: C901
+    """Parse a text, returning the serialized result and the result itself."""
+    buffer = bytearray(ParseCache.MAGIC)
+    items: List[Instruction | Text] = []
+    offset = 0
+    for piece in Ansi(text).escapes():
+        if not isinstance(piece, Escape):
+            items.append(piece)
+            buffer.append(_TEXT)
+            _write_int(buffer, offset)
+            _write_int(buffer, offset + len(piece))
+            offset += len(piece)
+            continue
+
+        offset += len(piece)
+        for instruction in piece.instructions():
+            items.append(instruction)
+            if isinstance(instruction, SetAttribute):
+                buffer.append(_ATTRIBUTE)
+                _write_int(buffer, instruction.attribute.value)
+            elif isinstance(instruction, SetColor):
+                buffer.append(_COLOR)
+                buffer.append(_ROLES.index(instruction.role))
+                color = instruction.color
+                if color is None:
+                    buffer.append(_DEFAULT_COLOR)
+                elif isinstance(color, ochre.Ansi256):
+                    buffer.append(_ANSI256_COLOR)
+                    _write_int(buffer, color.code)
+                else:
+                    # Decoded components are always integers over 255.
+                    buffer.append(_RGB_COLOR)
+                    for component in color.rgb:
+                        _write_int(buffer, round(component * 255))
+            elif isinstance(instruction, SetCursor):
+                buffer.append(_CURSOR)
+                _write_int(buffer, instruction.move.x)
+                _write_int(buffer, instruction.move.y)
+                buffer.append(instruction.move.relative)
+            elif isinstance(instruction, SetClear):
+                buffer.append(_CLEAR)
+                _write_int(buffer, instruction.region.value)
+            else:
+                assert isinstance(instruction, Unsupported)
+                kind = instruction.token.kind.encode("utf-8", "surrogatepass")
+                buffer.append(_UNSUPPORTED)
+                _write_int(buffer, len(kind))
+                buffer.extend(kind)
+                _write_int(buffer, instruction.token.data)
+    return bytes(buffer), items
+
+
+def _load(text: Text, data: bytes) -> Iterator[Instruction | Text]:  # noqa: C901
+    """Deserialize the parse result of a text."""
+    if not data.startswith(ParseCache.MAGIC):
+        raise ValueError("not a stransi cache entry")
+    pos = len(ParseCache.MAGIC)
+    while pos < len(data):
+        tag = data[pos]
+        pos += 1
+        if tag == _TEXT:
+            start, pos = _read_int(data, pos)
+            end, pos = _read_int(data, pos)
+            yield text[start:end]
+        elif tag == _ATTRIBUTE:
+            value, pos = _read_int(data, pos)
+            yield SetAttribute(Attribute(value))
+        elif tag == _COLOR:
+            role, kind = _ROLES[data[pos]], data[pos + 1]
+            pos += 2
+            color: Optional[ochre.Color] = None
+            if kind == _ANSI256_COLOR:
+                code, pos = _read_int(data, pos)
+                color = ochre.Ansi256(code)
+            elif kind == _RGB_COLOR:
+                red, pos = _read_int(data, pos)
+                green, pos = _read_int(data, pos)
+                blue, pos = _read_int(data, pos)
+                color = ochre.RGB(red / 255, green / 255, blue / 255)
+            elif kind != _DEFAULT_COLOR:
+                raise ValueError(f"unknown color kind {kind}")
+            yield SetColor(role, color)
+        elif tag == _CURSOR:
+            x, pos = _read_int(data, pos)
+            y, pos = _read_int(data, pos)
+            yield SetCursor(CursorMove(x=x, y=y, relative=bool(data[pos])))
+            pos += 1
+        elif tag == _CLEAR:
+            value, pos = _read_int(data, pos)
+            yield SetClear(Clear(value))
+        elif tag == _UNSUPPORTED:
+            size, pos = _read_int(data, pos)
+            kind_name = data[pos : pos + size].decode(  # noqa: E203
+                "utf-8", "surrogatepass"
+            )
+            value, pos = _read_int(data, pos + size)
+            yield Unsupported(Token(kind=kind_name, data=value))
+        else:
+            raise ValueError(f"unknown tag {tag}")
+
+
+class ParseCache:
+    r"""
+    A persistent on-disk cache of parsed ANSI strings.
+
+    Parse results are stored in a compact binary format, one file per input,
+    keyed by a hash of the input and the library version. Text is stored as
+    offsets into the input, so entries are usually much smaller than the
+    input itself. The least recently used entries are evicted once the cache
+    grows beyond `max_size` bytes.
+
+    The size of the cache is kept as a running estimate, so the directory is
+    only scanned when the estimate goes over `max_size`. Entries are then
+    evicted down to `EVICTION_TARGET` of it, so that scans stay rare. Writes
+    by other processes are noticed at the next scan.
+
+    Examples
+    --------
+    >>> import tempfile
+    >>> with tempfile.TemporaryDirectory() as directory:
+    ...     cache = ParseCache(directory)
+    ...     _ = cache.instructions("\x1b[1mHello")  # parses and stores
+    ...     cache.instructions("\x1b[1mHello")  # loads
+    [SetAttribute(attribute=<Attribute.BOLD: 1>), 'Hello']
+    """
+
+    MAGIC = b"stransi\x02"
+    SUFFIX = ".bin"
+    TEMPORARY_SUFFIX = ".tmp"
+    # Age (in seconds) after which temporary files are taken as left behind
+    STALE_AGE = 3600.0
+    # Fraction of the maximum size that evictions on writes go down to
+    EVICTION_TARGET = 0.9
+
+    def __init__(self, directory: PathLike, max_size: int = 64 * 1024 * 1024) -> None:
+        """Create a cache in the given directory (created if needed)."""
+        self.directory = Path(directory)
+        self.max_size = max_size
+        self.directory.mkdir(parents=True, exist_ok=True)
+        # Estimated size of all entries, unknown until the first scan
+        self._size: Optional[int] = None
+
+    def key(self, text: Text) -> Text:
+        """Return the cache key of a text."""
+        digest = hashlib.sha256(__version__.encode())
+        digest.update(b"\0")
+        digest.update(text.encode("utf-8", "surrogatepass"))
+        return digest.hexdigest()
+
+    def get(self, text: Text) -> Optional[List[Instruction | Text]]:
+        """Return the cached instructions of a text, or None if not cached."""
+        path = self._path(text)
+        try:
+            data = path.read_bytes()
+            instructions = list(_load(text, data))
+        except FileNotFoundError:
+            return None
+        except (IndexError, ValueError):
+            # A corrupt entry is as good as none
+            path.unlink(missing_ok=True)
+            return None
+        # Mark the entry as recently used
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            # Evicted by someone else in the meantime
+            pass
+        return instructions
+
+    def put(self, text: Text) -> List[Instruction | Text]:
+        """Parse a text, store the result and return it."""
+        data, instructions = _dump(text)
+        path = self._path(text)
+        file = tempfile.NamedTemporaryFile(
+            dir=self.directory, suffix=self.TEMPORARY_SUFFIX, delete=False
+        )
+        try:
+            with file:
+                file.write(data)
+            try:
+                replaced = path.stat().st_size
+            except FileNotFoundError:
+                replaced = 0
+            os.replace(file.name, path)
+        except BaseException:
+            # Don't leave the temporary file behind
+            Path(file.name).unlink(missing_ok=True)
+            raise
+
+        if self._size is not None:
+            self._size += len(data) - replaced
+        if self._size is None or self._size > self.max_size:
+            self.evict(int(self.max_size * self.EVICTION_TARGET))
+        return instructions
+
+    def instructions(self, text: Text) -> List[Instruction | Text]:
+        """Return the instructions of a text, parsing it only if not cached."""
+        if (instructions := self.get(text)) is not None:
+            return instructions
+        return self.put(text)
+
+    def evict(self, size: Optional[int] = None) -> None:
+        """
+        Remove the least recently used entries until the cache fits.
+
+        Entries are removed until the cache takes at most `size` bytes, or
+        `max_size` if not given.
+        """
+        limit = self.max_size if size is None else size
+        entries = sorted(self._entries(), key=lambda entry: entry[1].st_mtime)
+        total = sum(stat.st_size for _, stat in entries)
+        for path, stat in entries:
+            if total <= limit:
+                break
+            path.unlink(missing_ok=True)
+            total -= stat.st_size
+        self._size = total
+
+    def clear(self) -> None:
+        """Remove all entries."""
+        for path, _ in self._entries():
+            path.unlink(missing_ok=True)
+        self._size = 0
+
+    def _path(self, text: Text) -> Path:
+        """Return the path of the entry for a text."""
+        return self.directory / f"{self.key(text)}{self.SUFFIX}"
+
+    def _entries(self) -> Iterable[Tuple[Path, os.stat_result]]:
+        """
+        Yield the entries and their file status.
+
+        Stale temporary files (left behind by writers that died) are removed
+        along the way.
+        """
+        stale = time.time() - self.STALE_AGE
+        for entry in os.scandir(self.directory):
+            try:
+                if entry.name.endswith(self.SUFFIX):
+                    yield Path(entry.path), entry.stat()
+                elif (
+                    entry.name.endswith(self.TEMPORARY_SUFFIX)
+                    and entry.stat().st_mtime < stale
+                ):
+                    os.unlink(entry.path)
+            except FileNotFoundError:
+                # Removed by someone else in the meantime
+                continue
@@ -0,0 +1,214 @@
+"""Encode ANSI instructions back into escape sequences."""
+
+from __future__ import annotations
+
+from typing import Iterable, List, Optional, Text
+
+import ochre
+
+from .attribute import SetAttribute
+from .clear import Clear, SetClear
+from .color import SetColor
+from .cursor import CursorMove, SetCursor
+from .escape import _EXTENDED_COLOR_ROLES, _EXTENDED_COLOR_SIZES
+from .instruction import Instruction
+from .unsupported import Unsupported
+
+
+def _sgr_params(instruction: Instruction) -> List[int]:
+    """
+    Return the SGR parameters that encode the given instruction.
+
+    Examples
+    --------
+    >>> from stransi.attribute import Attribute
+    >>> from stransi.color import ColorRole
+    >>> _sgr_params(SetAttribute(Attribute.BOLD))
+    [1]
+    >>> _sgr_params(SetColor(ColorRole.FOREGROUND, ochre.Ansi256(9)))
+    [91]
+    >>> _sgr_params(SetColor(ColorRole.BACKGROUND, ochre.Ansi256(200)))
+    [48, 5, 200]
+    """
+    if isinstance(instruction, SetAttribute):
+        return [instruction.attribute.value]
+
+    assert isinstance(instruction, SetColor), f"{instruction!r} is not SGR"
+    base = instruction.role.value
+    color = instruction.color
+    if color is None:
+        # Default color
+        return [base + 9]
+    if isinstance(color, ochre.Ansi256):
+        if color.code < 8:
+            return [base + color.code]
+        if color.code < 16:
+            # Bright colors
+            return [base + 52 + color.code]
+        return [base + 8, 5, color.code]
+
+    # 24-bit color support
+    rgb = color.rgb
+    return [
+        base + 8,
+        2,
+        round(rgb.red * 255),
+        round(rgb.green * 255),
+        round(rgb.blue * 255),
+    ]
+
+
+def _sgr(params: Iterable[int]) -> Text:
+    r"""
+    Return a single SGR escape sequence with the given parameters.
+
+    Zero parameters are encoded as empty ones, which is the shortest equivalent
+    form (e.g., a reset becomes `ESC[m`).
+
+    Examples
+    --------
+    >>> _sgr([1, 31])
+    '\x1b[1;31m'
+    >>> _sgr([0])
+    '\x1b[m'
+    >>> _sgr([])
+    ''
+    """
+    params = list(params)
+    if not params:
+        return ""
+    return f"\N{ESC}[{';'.join(str(p) if p else '' for p in params)}m"
+
+
+def _csi(param: int, kind: Text) -> Text:
+    """Return a single-parameter escape sequence, omitting the default."""
+    return f"\N{ESC}[{param if param else ''}{kind}"
+
+
+def _cursor(move: CursorMove) -> Text:
+    r"""
+    Return the escape sequences that perform a cursor movement.
+
+    Absolute positions are written as `x;y`, the same way they are parsed.
+
+    Examples
+    --------
+    >>> _cursor(CursorMove.up(2)) + _cursor(CursorMove.right())
+    '\x1b[2A\x1b[C'
+    >>> _cursor(CursorMove.to_home()), _cursor(CursorMove.to(x=2, y=1))
+    ('\x1b[H', '\x1b[3;2H')
+    """
+    if not move.relative:
+        x = move.x + 1 if move.x else 0
+        y = move.y + 1 if move.y else 0
+        return f"\N{ESC}[{x if x else ''}{f';{y}' if y else ''}H"
+
+    pieces = []
+    if move.y:
+        pieces.append(_csi(abs(move.y) if abs(move.y) > 1 else 0, "AB"[move.y > 0]))
+    if move.x:
+        pieces.append(_csi(abs(move.x) if abs(move.x) > 1 else 0, "DC"[move.x > 0]))
+    return "".join(pieces)
+
+
+def _clear(region: Clear) -> Text:
+    r"""
+    Return the escape sequence that clears a screen region.
+
+    Examples
+    --------
+    >>> _clear(Clear.SCREEN), _clear(Clear.LINE_AFTER)
+    ('\x1b[2J', '\x1b[K')
+    """
+    if region.value < 3:
+        return _csi(region.value, "J")
+    return _csi(region.value - 3, "K")
+
+
+def issgr(instruction: Instruction | Text) -> bool:
+    """Return True if the instruction is encoded as a SGR parameter."""
+    return isinstance(instruction, (SetAttribute, SetColor))
+
+
+def _room(room: Optional[int], code: int) -> Optional[int]:
+    """
+    Return how many unsupported SGR parameters can still follow another one.
+
+    This is the number of parameters that can still go along with an
+    incomplete extended color (-1 while waiting for its color spec), or None
+    if there's no such color.
+    """
+    if code in _EXTENDED_COLOR_ROLES:
+        return -1
+    if room is None:
+        return None
+    if room < 0:
+        # Fewer parameters than the color needs were given.
+        size = _EXTENDED_COLOR_SIZES.get(code, 0)
+        return size - 1 if size else None
+    return room - 1
+
+
+def encode(items: Iterable[Instruction | Text]) -> Text:  # noqa: C901
+    r"""
+    Encode instructions and text back into a string.
+
+    Consecutive SGR instructions are coalesced into a single escape sequence,
+    along with the SGR parameters that aren't supported. Parameters of an
+    incomplete extended color (an unsupported 38 or 48) are kept together,
+    and nothing else goes after them that could be taken as part of it.
+
+    Examples
+    --------
+    >>> from stransi import Ansi
+    >>> encode(Ansi("\x1b[1;31mHello\x1b[m, world!").instructions())
+    '\x1b[1;31mHello\x1b[m, world!'
+    """
+    pieces: List[Text] = []
+    params: List[int] = []
+    # Unsupported parameters that can still go along with an incomplete
+    # extended color (-1 while waiting for its color spec)
+    room: Optional[int] = None
+    for item in items:
+        if issgr(item):
+            if room is not None:
+                pieces.append(_sgr(params))
+                params, room = [], None
+            params.extend(_sgr_params(item))
+            continue
+
+        if isinstance(item, Unsupported) and item.token.kind == "m":
+            code = item.token.data
+            if code in _EXTENDED_COLOR_ROLES and params:
+                # Always start incomplete extended colors on their own.
+                pieces.append(_sgr(params))
+                params = []
+            params.append(code)
+            room = _room(room, code)
+            if room == 0:
+                pieces.append(_sgr(params))
+                params, room = [], None
+            continue
+
+        if params:
+            pieces.append(_sgr(params))
+            params, room = [], None
+
+        if isinstance(item, SetCursor):
+            pieces.append(_cursor(item.move))
+            continue
+
+        if isinstance(item, SetClear):
+            pieces.append(_clear(item.region))
+            continue
+
+        if isinstance(item, Unsupported):
+            pieces.append(f"\N{ESC}[{item.token.data}{item.token.kind}")
+            continue
+
+        assert isinstance(item, str), f"cannot encode {item!r}"
+        pieces.append(item)
+
+    if params:
+        pieces.append(_sgr(params))
+    return "".join(pieces)
@@ -3,7 +3,8 @@
 from __future__ import annotations
 
 import re
-from typing import Iterable, Iterator, Text
+from functools import partial
+from typing import Callable, Dict, Iterable, Iterator, List, Text
 
 import ochre
 
@@ -26,10 +27,10 @@ class Escape(_CustomText):
     """A single ANSI escape sequence."""
 
     SEPARATOR = re.compile(r";")
-    ALL_ATTRIBUTE_CODES: set[int] = set(a.value for a in Attribute)
-    ALL_FOREGROUND_CODES: set[int] = set(range(30, 40)) | set(range(90, 98))
-    ALL_BACKGROUND_CODES: set[int] = set(range(40, 50)) | set(range(100, 108))
-    ALL_COLOR_CODES: set[int] = ALL_FOREGROUND_CODES | ALL_BACKGROUND_CODES
+    ALL_ATTRIBUTE_CODES: frozenset[int] = frozenset(a.value for a in Attribute)
+    ALL_FOREGROUND_CODES: frozenset[int] = frozenset([*range(30, 40), *range(90, 98)])
+    ALL_BACKGROUND_CODES: frozenset[int] = frozenset([*range(40, 50), *range(100, 108)])
+    ALL_COLOR_CODES: frozenset[int] = ALL_FOREGROUND_CODES | ALL_BACKGROUND_CODES
 
     def tokens(self) -> Iterator[Token]:
         """Yield individual tokens from the escape sequence."""
@@ -41,7 +42,7 @@ class Escape(_CustomText):
                 continue
             yield Token(kind=kind, data=int(param))
 
-    def instructions(self) -> Iterable[Instruction]:  # noqa: C901
+    def instructions(self) -> Iterable[Instruction]:
         r"""
         Decode a string of tokens into escapable objects.
 
@@ -54,125 +55,125 @@ class Escape(_CustomText):
         [SetAttribute(attribute=<Attribute.BLINK: 5>),
          SetColor(role=<ColorRole.BACKGROUND: 40>, color=Ansi256(code=4))]
         """
-        tokens = self.tokens()
-        while token := next(tokens, None):
-            if token.issgr():
-                if token.data in self.ALL_ATTRIBUTE_CODES:
-                    yield SetAttribute(Attribute(token.data))
-                    continue
-
-                if token.data in self.ALL_COLOR_CODES:
-                    if token.data in self.ALL_FOREGROUND_CODES:
-                        role = ColorRole.FOREGROUND
-                    elif token.data in self.ALL_BACKGROUND_CODES:
-                        role = ColorRole.BACKGROUND
-
-                    if token.data in {38, 48}:
-                        if not (color_spec_token := next(tokens, None)):
-                            yield Unsupported(token)
-                            continue
-                        if color_spec_token.data == 5:
-                            # 256-color support
-                            if not (color_index_token := next(tokens, None)):
-                                yield Unsupported(token)
-                                yield Unsupported(color_spec_token)
-                                continue
-                            color = ochre.Ansi256(color_index_token.data)
-                        elif color_spec_token.data == 2:
-                            # 24-bit color support
-                            if not (red_token := next(tokens, None)):
-                                yield Unsupported(token)
-                                yield Unsupported(color_spec_token)
-                                continue
-                            if not (green_token := next(tokens, None)):
-                                yield Unsupported(token)
-                                yield Unsupported(color_spec_token)
-                                yield Unsupported(red_token)
-                                continue
-                            if not (blue_token := next(tokens, None)):
-                                yield Unsupported(token)
-                                yield Unsupported(color_spec_token)
-                                yield Unsupported(red_token)
-                                yield Unsupported(green_token)
-                                continue
-                            color = ochre.RGB(
-                                red_token.data / 255,
-                                green_token.data / 255,
-                                blue_token.data / 255,
-                            )
-                        else:
-                            yield Unsupported(token)
-                            yield Unsupported(color_spec_token)
-                            continue
-                    elif token.data in {39, 49}:
-                        # Default color
-                        color = None
-                    else:
-                        # 8-color support
-
-                        # The value of role is the index of the first color in
-                        # the corresponding palette, that's why it works.
-                        color_index = token.data - role.value
-                        if token.data >= 90:
-                            # Bright colors
-                            color_index -= 52
-
-                        color = ochre.Ansi256(color_index)
-
-                    yield SetColor(role=role, color=color)
-                    continue
-
-            if token.kind == "A":
-                yield SetCursor(CursorMove.up(token.data if token.data else 1))
-                continue
-
-            if token.kind == "B":
-                yield SetCursor(CursorMove.down(token.data if token.data else 1))
-                continue
-
-            if token.kind == "C":
-                yield SetCursor(CursorMove.right(token.data if token.data else 1))
-                continue
-
-            if token.kind == "D":
-                yield SetCursor(CursorMove.left(token.data if token.data else 1))
-                continue
-
-            if token.kind in {"H", "f"}:
-                try:
-                    next_data = next(tokens).data
-                except StopIteration:
-                    next_data = 0
-                x = token.data if token.data else 1
-                y = next_data if next_data else 1
-                # ANSI escape sequences are 1-based, but we want 0-based.
-                yield SetCursor(CursorMove.to(x - 1, y - 1))
-                continue
-
-            if token.kind == "J":
-                if token.data == 0:
-                    yield SetClear(Clear.SCREEN_AFTER)
-                    continue
-
-                if token.data == 1:
-                    yield SetClear(Clear.SCREEN_BEFORE)
-                    continue
-
-                if token.data == 2:
-                    yield SetClear(Clear.SCREEN)
-                    continue
-
-            if token.kind == "K":
-                if token.data == 0:
-                    yield SetClear(Clear.LINE_AFTER)
-                    continue
-
-                if token.data == 1:
-                    yield SetClear(Clear.LINE_BEFORE)
-                    continue
-
-                if token.data == 2:
-                    yield SetClear(Clear.LINE)
-                    continue
-
-            yield Unsupported(token)
+        assert isescape(self), f"{self!r} is not an escape sequence"
+        kind = self[-1]
+        params = [int(param) if param else 0 for param in self[2:-1].split(";")]
+        yield from _DECODERS.get(kind, _decode_unsupported)(kind, params)
+
+
+# Decoders of the parameters of an escape sequence, indexed by final byte.
+_Decoder = Callable[[Text, List[int]], Iterator[Instruction]]
+
+
+def _decode_unsupported(kind: Text, params: List[int]) -> Iterator[Instruction]:
+    """Decode parameters of an escape sequence we don't support."""
+    for param in params:
+        yield Unsupported(Token(kind=kind, data=param))
+
+
+def _decode_sgr(kind: Text, params: List[int]) -> Iterator[Instruction]:
+    """Decode SGR parameters."""
+    index, length = 0, len(params)
+    while index < length:
+        code = params[index]
+        index += 1
+        if (factory := _SGR.get(code)) is not None:
+            yield factory()
+            continue
+
+        if (role := _EXTENDED_COLOR_ROLES.get(code)) is None:
+            yield Unsupported(Token(kind=kind, data=code))
+            continue
+
+        # Extended colors need a color spec and then one or three parameters.
+        size = _EXTENDED_COLOR_SIZES.get(params[index], 0) if index < length else 0
+        if not size or index + 1 + size > length:
+            yield Unsupported(Token(kind=kind, data=code))
+            # Whatever is left can't be decoded either.
+            end = index + 1 if index < length and not size else length
+            yield from _decode_unsupported(kind, params[index:end])
+            index = end
+            continue
+
+        if size == 1:
+            # 256-color support
+            color: ochre.Color = ochre.Ansi256(params[index + 1])
+        else:
+            # 24-bit color support
+            red, green, blue = params[index + 1 : index + 4]  # noqa: E203
+            color = ochre.RGB(red / 255, green / 255, blue / 255)
+        index += 1 + size
+        yield SetColor(role=role, color=color)
+
+
+def _decode_cursor_move(kind: Text, params: List[int]) -> Iterator[Instruction]:
+    """Decode relative cursor movements."""
+    move = _CURSOR_MOVES[kind]
+    for steps in params:
+        yield SetCursor(move(steps if steps else 1))
+
+
+def _decode_cursor_position(kind: Text, params: List[int]) -> Iterator[Instruction]:
+    """Decode absolute cursor positions."""
+    for index in range(0, len(params), 2):
+        x = params[index]
+        y = params[index + 1] if index + 1 < len(params) else 0
+        # ANSI escape sequences are 1-based, but we want 0-based.
+        yield SetCursor(CursorMove.to((x if x else 1) - 1, (y if y else 1) - 1))
+
+
+def _decode_clear(kind: Text, params: List[int]) -> Iterator[Instruction]:
+    """Decode screen and line clearing."""
+    regions = _CLEAR_REGIONS[kind]
+    for param in params:
+        if (region := regions.get(param)) is not None:
+            yield SetClear(region)
+            continue
+        yield Unsupported(Token(kind=kind, data=param))
+
+
+def _sgr_table() -> Dict[int, Callable[[], Instruction]]:
+    """Build factories of instructions for all single-parameter SGR codes."""
+    table: Dict[int, Callable[[], Instruction]] = {}
+    for attribute in Attribute:
+        table[attribute.value] = partial(SetAttribute, attribute)
+    for role, codes in [
+        (ColorRole.FOREGROUND, Escape.ALL_FOREGROUND_CODES),
+        (ColorRole.BACKGROUND, Escape.ALL_BACKGROUND_CODES),
+    ]:
+        for code in codes - {role.value + 8}:
+            if code == role.value + 9:
+                # Default color
+                color = None
+            else:
+                # The value of role is the index of the first color in the
+                # corresponding palette, bright colors come 52 codes later.
+                color = ochre.Ansi256(code - role.value - (52 if code >= 90 else 0))
+            table[code] = partial(SetColor, role=role, color=color)
+    return table
+
+
+# All the tables are built at import time and never written afterwards, so
+# decoding only reads shared state and is safe to run from many threads at
+# once (with or without the global interpreter lock).
+_SGR = _sgr_table()
+_EXTENDED_COLOR_ROLES = {38: ColorRole.FOREGROUND, 48: ColorRole.BACKGROUND}
+# Number of parameters after the color spec (5 for 256 colors, 2 for RGB)
+_EXTENDED_COLOR_SIZES = {5: 1, 2: 3}
+_CURSOR_MOVES: Dict[Text, Callable[[int], CursorMove]] = {
+    "A": CursorMove.up,
+    "B": CursorMove.down,
+    "C": CursorMove.right,
+    "D": CursorMove.left,
+}
+_CLEAR_REGIONS: Dict[Text, Dict[int, Clear]] = {
+    "J": {0: Clear.SCREEN_AFTER, 1: Clear.SCREEN_BEFORE, 2: Clear.SCREEN},
+    "K": {0: Clear.LINE_AFTER, 1: Clear.LINE_BEFORE, 2: Clear.LINE},
+}
+_DECODERS: Dict[Text, _Decoder] = {
+    "m": _decode_sgr,
+    **{kind: _decode_cursor_move for kind in _CURSOR_MOVES},
+    "H": _decode_cursor_position,
+    "f": _decode_cursor_position,
+    **{kind: _decode_clear for kind in _CLEAR_REGIONS},
+}
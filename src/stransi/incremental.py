@@ -0,0 +1,402 @@
+"""Incremental parsing of ANSI strings that are edited in place."""
+
+from __future__ import annotations
+
+from bisect import bisect_right
+from itertools import accumulate
+from typing import Iterable, Iterator, List, Optional, Text, Tuple, Union
+
+from .ansi import Ansi
+from .escape import Escape, isescape
+from .instruction import Instruction
+from .style import DEFAULT, Style
+
+_Decoded = Union[Tuple[Instruction, ...], ValueError]
+
+# Number of spans per block (blocks are between half and twice this size)
+_BLOCK_SIZE = 64
+
+
+def _ismatch(piece: Escape | Text) -> bool:
+    """Return True if a piece is a complete escape sequence."""
+    return isinstance(piece, Escape) and Ansi.PATTERN.fullmatch(piece) is not None
+
+
+def _decode(piece: Escape | Text) -> _Decoded:
+    """
+    Decode the instructions of a piece.
+
+    Text that only looks like an escape might not be decodable, in which case
+    the error is kept to be raised when instructions are requested, just like
+    `Ansi.instructions()` does.
+    """
+    if not isinstance(piece, Escape):
+        return ()
+    try:
+        return tuple(piece.instructions())
+    except ValueError as error:
+        return error
+
+
+def _apply(style: Style, instructions: _Decoded) -> Style:
+    """Return the style after some decoded instructions."""
+    if isinstance(instructions, ValueError):
+        return style
+    for instruction in instructions:
+        style = style.apply(instruction)
+    return style
+
+
+def _text_piece(text: Text) -> Escape | Text:
+    """Return a piece of text, classified the same way `Ansi.escapes()` does."""
+    if isescape(text):
+        return Escape(text)
+    return text
+
+
+def _scan(text: Text, lo: int, hi: int) -> List[Escape | Text]:
+    """Split `text[lo:hi]` into escape sequences and text."""
+    pieces: List[Escape | Text] = []
+    prev_end = lo
+    for match in Ansi.PATTERN.finditer(text, lo, hi):
+        if prev_end < match.start():
+            pieces.append(_text_piece(text[prev_end : match.start()]))  # noqa: E203
+        pieces.append(Escape(match.group(0)))
+        prev_end = match.end()
+    if prev_end < hi:
+        pieces.append(_text_piece(text[prev_end:hi]))
+    return pieces
+
+
+def _parse(
+    pieces: List[Escape | Text], style: Style
+) -> Tuple[List[Escape | Text], List[_Decoded], List[Style]]:
+    """Decode pieces and compute their styles, starting from a style."""
+    instructions: List[_Decoded] = []
+    styles: List[Style] = []
+    for piece in pieces:
+        instructions.append(_decode(piece))
+        styles.append(style)
+        style = _apply(style, instructions[-1])
+    return pieces, instructions, styles
+
+
+class _Block:
+    """Consecutive spans, with their offsets relative to the block."""
+
+    __slots__ = ("pieces", "instructions", "styles", "starts", "length")
+
+    def __init__(
+        self,
+        pieces: List[Escape | Text],
+        instructions: List[_Decoded],
+        styles: List[Style],
+    ) -> None:
+        self.pieces = pieces
+        self.instructions = instructions
+        self.styles = styles
+        self.starts = list(accumulate(map(len, pieces), initial=0))
+        self.length = self.starts.pop()
+
+
+class _Fenwick:
+    """
+    A Fenwick tree of lengths, to find where each one starts in O(log n).
+
+    Examples
+    --------
+    >>> tree = _Fenwick([3, 1, 4])
+    >>> tree.prefix(2), tree.find(3), tree.find(4)
+    (4, 1, 2)
+    >>> tree.add(0, 2)
+    >>> tree.prefix(2), tree.find(3)
+    (6, 0)
+    """
+
+    def __init__(self, lengths: Iterable[int]) -> None:
+        """Build the tree in O(n)."""
+        tree = [0, *lengths]
+        for index in range(1, len(tree)):
+            parent = index + (index & -index)
+            if parent < len(tree):
+                tree[parent] += tree[index]
+        self._tree = tree
+
+    def add(self, index: int, delta: int) -> None:
+        """Add to one of the lengths."""
+        tree = self._tree
+        index += 1
+        while index < len(tree):
+            tree[index] += delta
+            index += index & -index
+
+    def prefix(self, index: int) -> int:
+        """Return the sum of the first `index` lengths."""
+        tree = self._tree
+        total = 0
+        while index > 0:
+            total += tree[index]
+            index -= index & -index
+        return total
+
+    def find(self, offset: int) -> int:
+        """Return the index of the (positive) length that covers an offset."""
+        tree = self._tree
+        position = 0
+        step = 1 << (len(tree) - 1).bit_length()
+        while step:
+            following = position + step
+            if following < len(tree) and tree[following] <= offset:
+                position = following
+                offset -= tree[following]
+            step >>= 1
+        return position
+
+
+class IncrementalAnsi:
+    r"""
+    An ANSI string that keeps its parse up to date across edits.
+
+    The string is stored as spans (escape sequences and the text between
+    them), together with their instructions and the style that is active
+    right before each of them. Spans are grouped in blocks that only know
+    their offsets relative to the block, and a Fenwick tree of block lengths
+    finds where each block starts. An edit only re-scans the spans it
+    touches (expanded to the nearest escape sequence boundaries) and only
+    rebuilds their blocks, so its cost doesn't depend on how much text comes
+    after it. Styles are recomputed downstream until they agree with the
+    previous parse.
+
+    Examples
+    --------
+    >>> s = IncrementalAnsi("\x1b[1mHello\x1b[m, world!")
+    >>> s.edit(2, 3, "31")
+    >>> s.text
+    Ansi('\x1b[31mHello\x1b[m, world!')
+    >>> list(s.escapes())
+    [Escape('\x1b[31m'), 'Hello', Escape('\x1b[m'), ', world!']
+    """
+
+    def __init__(self, text: Text = "") -> None:
+        """Parse the whole text once."""
+        self._blocks: List[_Block] = []
+        self._tree = _Fenwick([])
+        self._length = len(text)
+        # The whole text, joined when needed
+        self._text: Optional[Text] = text
+        self._replace_blocks(0, 0, *_parse(_scan(text, 0, len(text)), DEFAULT))
+
+    @property
+    def text(self) -> Ansi:
+        """Return the current text."""
+        if self._text is None:
+            self._text = "".join(self.escapes())
+        return Ansi(self._text)
+
+    def __len__(self) -> int:
+        """Return the length of the current text."""
+        return self._length
+
+    def escapes(self) -> Iterator[Escape | Text]:
+        """Yield ANSI escapes and text in the order they appear."""
+        for block in self._blocks:
+            yield from block.pieces
+
+    def instructions(self) -> Iterator[Instruction | Text]:
+        """Yield ANSI instructions and text in the order they appear."""
+        for block in self._blocks:
+            for piece, instructions in zip(block.pieces, block.instructions):
+                if isinstance(instructions, ValueError):
+                    raise instructions
+                if isinstance(piece, Escape):
+                    yield from instructions
+                    continue
+                yield piece
+
+    def runs(self) -> Iterator[Tuple[Style, Text]]:
+        """Yield each piece of text together with the style it is shown in."""
+        for block in self._blocks:
+            for piece, style in zip(block.pieces, block.styles):
+                if not isinstance(piece, Escape):
+                    yield style, piece
+
+    def style_at(self, offset: int) -> Style:
+        """Return the style that is active at the given offset."""
+        if not 0 <= offset <= self._length:
+            raise IndexError(f"offset {offset} out of range")
+        if not self._blocks:
+            return DEFAULT
+        if offset == self._length:
+            # Past the last span
+            last = self._blocks[-1]
+            return _apply(last.styles[-1], last.instructions[-1])
+        number = self._tree.find(offset)
+        block = self._blocks[number]
+        index = bisect_right(block.starts, offset - self._tree.prefix(number)) - 1
+        return block.styles[index]
+
+    def edit(self, start: int, end: int, replacement: Text = "") -> None:
+        """Replace `text[start:end]` with the given replacement."""
+        if not 0 <= start <= end <= self._length:
+            raise IndexError(f"edit range {start}:{end} out of range")
+        if not self._blocks:
+            pieces = _scan(replacement, 0, len(replacement))
+            self._replace_blocks(0, 0, *_parse(pieces, DEFAULT))
+            self._length = len(replacement)
+            self._text = replacement
+            return
+
+        # Spans touched by the edit, including the one right before it
+        window = _Window(self, start, end)
+        first = window.index(max(start - 1, 0))
+        last = window.index(min(end, self._length - 1))
+        while True:
+            # Both neighbors of the spans are needed to know whether to grow.
+            shift = window.load_before(first)
+            first, last = first + shift, last + shift
+            window.load_after(last)
+            # Window offsets are the same before and after the edit up to it.
+            lo = window.starts[first]
+            hi = window.starts[last + 1] + len(replacement) - (end - start)
+            pieces = _scan(window.text(start, end, replacement), lo, hi)
+            grow = False
+            if not (pieces and _ismatch(pieces[0])) and window.istext(first - 1):
+                # A removed escape joins two pieces of text
+                first -= 1
+                grow = True
+            if not (pieces and _ismatch(pieces[-1])) and window.istext(last + 1):
+                # A partial escape might be completed by the next piece of text
+                last += 1
+                grow = True
+            if not grow:
+                break
+
+        self._length += len(replacement) - (end - start)
+        self._text = None
+        window.splice(first, last + 1, pieces)
+
+    def _replace_blocks(
+        self,
+        lo: int,
+        hi: int,
+        pieces: List[Escape | Text],
+        instructions: List[_Decoded],
+        styles: List[Style],
+    ) -> int:
+        """Replace blocks `lo:hi` with new ones for the given spans."""
+        count = hi - lo
+        if not count <= len(pieces) <= 2 * _BLOCK_SIZE * count:
+            count = -(-len(pieces) // _BLOCK_SIZE)
+        blocks = []
+        for number in range(count):
+            # Spread the spans evenly among the blocks.
+            i = len(pieces) * number // count
+            j = len(pieces) * (number + 1) // count
+            blocks.append(_Block(pieces[i:j], instructions[i:j], styles[i:j]))
+
+        if count == hi - lo:
+            for number, block in enumerate(blocks, lo):
+                self._tree.add(number, block.length - self._blocks[number].length)
+            self._blocks[lo:hi] = blocks
+        else:
+            self._blocks[lo:hi] = blocks
+            self._tree = _Fenwick(block.length for block in self._blocks)
+        return count
+
+    def _propagate(self, number: int, style: Style) -> None:
+        """Update styles from the start of a block until they agree."""
+        for number in range(number, len(self._blocks)):
+            block = self._blocks[number]
+            styles, instructions = block.styles, block.instructions
+            for index in range(len(styles)):
+                if styles[index] == style:
+                    return
+                styles[index] = style
+                style = _apply(style, instructions[index])
+
+
+class _Window:
+    """Consecutive blocks of an `IncrementalAnsi`, flattened to be edited."""
+
+    def __init__(self, owner: IncrementalAnsi, start: int, end: int) -> None:
+        """Load the blocks of the spans around an edit."""
+        self.owner = owner
+        # Blocks `lo:hi` are loaded, and `base` is where they start
+        self.lo = owner._tree.find(max(start - 1, 0))
+        self.hi = owner._tree.find(min(end, len(owner) - 1)) + 1
+        self.base = owner._tree.prefix(self.lo)
+        self.pieces: List[Escape | Text] = []
+        self.instructions: List[_Decoded] = []
+        self.styles: List[Style] = []
+        for block in owner._blocks[self.lo : self.hi]:  # noqa: E203
+            self._extend(len(self.pieces), block)
+        self._update()
+
+    def index(self, offset: int) -> int:
+        """Return the index of the span that contains an (absolute) offset."""
+        return bisect_right(self.starts, offset - self.base) - 1
+
+    def istext(self, index: int) -> bool:
+        """Return True if the given span is loaded and is text."""
+        return 0 <= index < len(self.pieces) and not _ismatch(self.pieces[index])
+
+    def load_before(self, index: int) -> int:
+        """Load the span before an index, if any, and return the index shift."""
+        if index > 0 or self.lo == 0:
+            return 0
+        self.lo -= 1
+        block = self.owner._blocks[self.lo]
+        self.base -= block.length
+        self._extend(0, block)
+        self._update()
+        return len(block.pieces)
+
+    def load_after(self, index: int) -> None:
+        """Load the span after an index, if any."""
+        if index + 1 < len(self.pieces) or self.hi == len(self.owner._blocks):
+            return
+        self._extend(len(self.pieces), self.owner._blocks[self.hi])
+        self.hi += 1
+        self._update()
+
+    def text(self, start: int, end: int, replacement: Text) -> Text:
+        """Return the text of the window after the edit."""
+        start -= self.base
+        end -= self.base
+        return f"{self._text[:start]}{replacement}{self._text[end:]}"
+
+    def splice(self, first: int, last: int, pieces: List[Escape | Text]) -> None:
+        """Replace spans `first:last` and update the blocks and styles."""
+        owner = self.owner
+        style = self.styles[first]
+        _, instructions, styles = _parse(pieces, style)
+        if styles:
+            style = _apply(styles[-1], instructions[-1])
+        self.pieces[first:last] = pieces
+        self.instructions[first:last] = instructions
+        self.styles[first:last] = styles
+
+        # Propagate the new style until it agrees with the previous parse.
+        index = first + len(pieces)
+        while index < len(self.pieces) and self.styles[index] != style:
+            self.styles[index] = style
+            style = _apply(style, self.instructions[index])
+            index += 1
+        agrees = index < len(self.pieces)
+
+        count = owner._replace_blocks(
+            self.lo, self.hi, self.pieces, self.instructions, self.styles
+        )
+        if not agrees:
+            owner._propagate(self.lo + count, style)
+
+    def _extend(self, index: int, block: _Block) -> None:
+        """Insert the spans of a block at an index."""
+        self.pieces[index:index] = block.pieces
+        self.instructions[index:index] = block.instructions
+        self.styles[index:index] = block.styles
+
+    def _update(self) -> None:
+        """Recompute the offsets and text of the window."""
+        self.starts = list(accumulate(map(len, self.pieces), initial=0))
+        self._text = "".join(self.pieces)
@@ -0,0 +1,140 @@
+"""Random access to the lines of large ANSI texts."""
+
+from __future__ import annotations
+
+from array import array
+from typing import BinaryIO, List, Text
+
+from .ansi import Ansi
+from .escape import Escape
+from .style import DEFAULT, Style
+
+
+def _strip_newline(line: bytes) -> bytes:
+    """Remove the line break at the end of a line, if any."""
+    if line.endswith(b"\r\n"):
+        return line[:-2]
+    if line.endswith(b"\n"):
+        return line[:-1]
+    return line
+
+
+class LineIndex:
+    r"""
+    An index of the lines of a file and the style each of them starts in.
+
+    The file is scanned once, recording the offset of every line and the style
+    that is active at the start of every `every`-th line (a checkpoint). Any
+    line can then be rendered with the right style by seeking to it and
+    replaying at most `every - 1` lines since the last checkpoint. The
+    default (a checkpoint at every line) makes that a single seek.
+
+    The file must be opened in binary mode, be seekable and use an encoding
+    that is compatible with ASCII.
+
+    Examples
+    --------
+    >>> import io
+    >>> log = io.BytesIO(b"\x1b[31mred\nstill red\x1b[m\nplain\n")
+    >>> index = LineIndex(log)
+    >>> len(index)
+    3
+    >>> index.line(1)
+    Ansi('\x1b[31mstill red\x1b[m')
+    >>> index.line(2)
+    Ansi('plain')
+    """
+
+    def __init__(
+        self,
+        file: BinaryIO,
+        every: int = 1,
+        encoding: Text = "utf-8",
+        errors: Text = "replace",
+    ) -> None:
+        """Scan a file and index its lines."""
+        if every < 1:
+            raise ValueError(f"every must be positive, got {every}")
+        self.file = file
+        self.every = every
+        self.encoding = encoding
+        self.errors = errors
+
+        self._offsets = array("Q")
+        self._checkpoints: List[Style] = []
+
+        style = DEFAULT
+        offset = file.seek(0)
+        for number, line in enumerate(iter(file.readline, b"")):
+            self._offsets.append(offset)
+            offset += len(line)
+            if not number % every:
+                self._checkpoints.append(style)
+            style = self._style_after(style, line)
+
+    def __len__(self) -> int:
+        """Return the number of lines."""
+        return len(self._offsets)
+
+    def offset(self, number: int) -> int:
+        """Return the offset of a line in the file."""
+        return self._offsets[number]
+
+    def style(self, number: int) -> Style:
+        """Return the style that is active at the start of a line."""
+        if not 0 <= number < len(self):
+            raise IndexError(f"line {number} out of range")
+        checkpoint, remaining = divmod(number, self.every)
+        style = self._checkpoints[checkpoint]
+        if remaining:
+            self.file.seek(self._offsets[number - remaining])
+            for _ in range(remaining):
+                style = self._style_after(style, self.file.readline())
+        return style
+
+    def line(self, number: int) -> Ansi:
+        """
+        Return a line (without its line break) ready to be shown on its own.
+
+        The style the line starts in is re-opened at its beginning, and the
+        style it ends in is closed at its end.
+        """
+        if not 0 <= number < len(self):
+            raise IndexError(f"line {number} out of range")
+        return self.lines(number, number + 1)[0]
+
+    def lines(self, start: int, stop: int) -> List[Ansi]:
+        """Return a range of lines, like `line()` does for a single one."""
+        start, stop, _ = slice(start, stop).indices(len(self))
+        if start >= stop:
+            return []
+        style = self.style(start)
+        self.file.seek(self._offsets[start])
+        lines = []
+        for _ in range(start, stop):
+            raw = self.file.readline()
+            text = _strip_newline(raw).decode(self.encoding, self.errors)
+            end_style = self._style_after(style, raw)
+            lines.append(Ansi(f"{style.escape()}{text}{DEFAULT.escape(end_style)}"))
+            style = end_style
+        return lines
+
+    def _style_after(self, style: Style, line: bytes) -> Style:
+        """
+        Return the style that is active after a line.
+
+        Escape sequences that can't be decoded (e.g., private modes like
+        `\x1b[?25l`) are assumed not to change the style.
+        """
+        if b"\x1b[" not in line:
+            return style
+        for escape in Ansi(line.decode(self.encoding, self.errors)).escapes():
+            if not isinstance(escape, Escape):
+                continue
+            try:
+                instructions = list(escape.instructions())
+            except ValueError:
+                continue
+            for instruction in instructions:
+                style = style.apply(instruction)
+        return style
@@ -0,0 +1,227 @@
+"""Parse once and broadcast the result to several consumers."""
+
+from __future__ import annotations
+
+import re
+from abc import ABC, abstractmethod
+from collections import Counter
+from typing import Any, Callable, List, Sequence, Text, Tuple
+
+from .ansi import Ansi
+from .escape import Escape, isescape
+from .instruction import Instruction
+from .style import DEFAULT, Style
+from .unsupported import Unsupported
+
+Batch = Sequence["Instruction | Text"]
+
+# The beginning of an escape sequence that might be completed later on
+_PARTIAL = re.compile(r"\N{ESC}(\[[\d;]*)?")
+
+
+def _partial(text: Text) -> Text:
+    """Return the end of a text that might be the start of an escape sequence."""
+    start = text.rfind("\N{ESC}")
+    if start >= 0 and _PARTIAL.fullmatch(text, start):
+        return text[start:]
+    return ""
+
+
+class Sink(ABC):
+    """A consumer of parsed instructions and text, fed in batches."""
+
+    @abstractmethod
+    def feed(self, batch: Batch) -> None:
+        """Consume a batch of instructions and text."""
+
+    def result(self) -> Any:
+        """Return the result of consuming everything so far."""
+        return None
+
+
+class Collect(Sink):
+    """Collect every instruction and piece of text."""
+
+    def __init__(self) -> None:
+        self.items: List[Instruction | Text] = []
+
+    def feed(self, batch: Batch) -> None:
+        """Collect a batch."""
+        self.items.extend(batch)
+
+    def result(self) -> List[Instruction | Text]:
+        """Return everything collected."""
+        return self.items
+
+
+class Strip(Sink):
+    """Keep only the text, dropping every instruction."""
+
+    def __init__(self) -> None:
+        self.pieces: List[Text] = []
+
+    def feed(self, batch: Batch) -> None:
+        """Keep the text of a batch."""
+        self.pieces.extend(item for item in batch if isinstance(item, str))
+
+    def result(self) -> Text:
+        """Return the plain text."""
+        return "".join(self.pieces)
+
+
+class Runs(Sink):
+    """Group text into runs of the same style."""
+
+    def __init__(self) -> None:
+        self.style = DEFAULT
+        self.runs: List[Tuple[Style, Text]] = []
+
+    def feed(self, batch: Batch) -> None:
+        """Update the style and runs with a batch."""
+        style, runs = self.style, self.runs
+        for item in batch:
+            if not isinstance(item, str):
+                style = style.apply(item)
+            elif runs and runs[-1][0] == style:
+                runs[-1] = (style, runs[-1][1] + item)
+            else:
+                runs.append((style, item))
+        self.style = style
+
+    def result(self) -> List[Tuple[Style, Text]]:
+        """Return the runs of text and their styles."""
+        return self.runs
+
+
+class CountUnsupported(Sink):
+    """Count the tokens of unsupported instructions."""
+
+    def __init__(self) -> None:
+        self.counts: Counter[Tuple[Text, int]] = Counter()
+
+    def feed(self, batch: Batch) -> None:
+        """Count the unsupported tokens of a batch."""
+        self.counts.update(
+            (item.token.kind, item.token.data)
+            for item in batch
+            if isinstance(item, Unsupported)
+        )
+
+    def result(self) -> Counter[Tuple[Text, int]]:
+        """Return how many times each (kind, data) token was seen."""
+        return self.counts
+
+
+class Callback(Sink):
+    """Hand every batch to a function (e.g., a converter to another format)."""
+
+    def __init__(self, function: Callable[[Batch], Any]) -> None:
+        self.function = function
+
+    def feed(self, batch: Batch) -> None:
+        """Call the function with a batch."""
+        self.function(batch)
+
+
+class Pipeline:
+    r"""
+    Parse ANSI text once and broadcast the result to several sinks.
+
+    Parsed instructions and text are handed to the sinks in batches, which
+    keeps the per-item call overhead low. Text can be fed in chunks, as it is
+    read, and is parsed just like `Ansi.instructions()` would parse the whole
+    of it. Text is passed on as soon as it can't be part of an escape
+    sequence, so a piece of text may be split into several consecutive ones.
+
+    Examples
+    --------
+    >>> pipeline = Pipeline(Strip(), CountUnsupported())
+    >>> pipeline.run("\x1b[1mHello\x1b[6m, world!\x1b[s")
+    ['Hello, world!', Counter({('m', 6): 1, ('s', 0): 1})]
+    """
+
+    def __init__(self, *sinks: Sink, batch_size: int = 1024) -> None:
+        """Create a pipeline that feeds the given sinks."""
+        if batch_size < 1:
+            raise ValueError(f"batch_size must be positive, got {batch_size}")
+        self.sinks = list(sinks)
+        self.batch_size = batch_size
+        self._batch: List[Instruction | Text] = []
+        # Text that can't be parsed yet, and whether it continues a piece of
+        # text that was already passed on
+        self._held = ""
+        self._continued = False
+
+    def add(self, sink: Sink) -> Sink:
+        """Add a sink (before feeding anything) and return it."""
+        self.sinks.append(sink)
+        return sink
+
+    def feed(self, chunk: Text) -> None:
+        """Parse a chunk of text."""
+        text = self._held + chunk
+        end = self._parse(text)
+        rest = text[end:]
+        if end:
+            self._continued = False
+        if not self._continued and isescape(rest):
+            # A piece of text that looks like an escape is parsed as one, as
+            # `Ansi` does, so it has to be complete.
+            self._held = rest
+            return
+
+        tail = _partial(rest)
+        if len(tail) < len(rest):
+            self._add(rest[: len(rest) - len(tail)])
+            self._continued = True
+        self._held = tail
+
+    def close(self) -> List[Any]:
+        """Parse whatever is left and return the results of the sinks."""
+        if self._held:
+            self._piece(self._held, self._continued)
+        self._held = ""
+        self._continued = False
+        self._flush()
+        return [sink.result() for sink in self.sinks]
+
+    def run(self, text: Text) -> List[Any]:
+        """Parse a whole text and return the results of the sinks."""
+        self.feed(text)
+        return self.close()
+
+    def _parse(self, text: Text) -> int:
+        """Parse text up to its last escape sequence and return where it ends."""
+        end = 0
+        for match in Ansi.PATTERN.finditer(text):
+            if end < match.start():
+                self._piece(
+                    text[end : match.start()],  # noqa: E203
+                    not end and self._continued,
+                )
+            for instruction in Escape(match.group()).instructions():
+                self._add(instruction)
+            end = match.end()
+        return end
+
+    def _piece(self, text: Text, continued: bool) -> None:
+        """Parse a whole piece of text (or the rest of one)."""
+        if continued or not isescape(text):
+            self._add(text)
+            return
+        for instruction in Escape(text).instructions():
+            self._add(instruction)
+
+    def _add(self, item: Instruction | Text) -> None:
+        """Add an item to the batch, handing it to the sinks when full."""
+        self._batch.append(item)
+        if len(self._batch) >= self.batch_size:
+            self._flush()
+
+    def _flush(self) -> None:
+        """Hand the current batch to every sink."""
+        if not self._batch:
+            return
+        batch, self._batch = self._batch, []
+        for sink in self.sinks:
+            sink.feed(batch)
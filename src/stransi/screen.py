@@ -0,0 +1,214 @@
+"""Screens of styled lines and the differences between them."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Iterable, List, Optional, Sequence, Text, Tuple
+
+from ._misc import _char_width
+from .ansi import Ansi
+from .clear import Clear, SetClear
+from .cursor import CursorMove, SetCursor
+from .encode import _cursor, encode
+from .instruction import Instruction
+from .style import DEFAULT, Style
+
+# A single screen column: its text and style. The column right after a wide
+# character is a placeholder with empty text.
+Cell = Tuple[Text, Style]
+Line = Tuple[Cell, ...]
+
+# Length of the shortest cursor movement over more than one column
+_MOVE_COST = len(_cursor(CursorMove.right(2)))
+
+
+@dataclass(frozen=True)
+class Screen:
+    r"""
+    A screen state: lines of styled cells, one per terminal column.
+
+    Examples
+    --------
+    >>> old = Screen.from_ansi("Hello, world!")
+    >>> new = Screen.from_ansi("Hello, \x1b[1mthere\x1b[m!")
+    >>> render(old, new)
+    Ansi('\x1b[H\x1b[7C\x1b[1mthere\x1b[m')
+    """
+
+    lines: Tuple[Line, ...] = ()
+
+    @classmethod
+    def from_instructions(cls, items: Iterable[Instruction | Text]) -> Screen:
+        """
+        Build a screen from text and instructions.
+
+        Lines are separated by line breaks. Other control characters, cursor
+        movements and clearing instructions are ignored.
+        """
+        lines: List[Line] = []
+        line: List[Cell] = []
+        style = DEFAULT
+        char_width = _char_width.cached()
+        for item in items:
+            if not isinstance(item, str):
+                style = style.apply(item)
+                continue
+
+            for char in item:
+                if char == "\n":
+                    lines.append(tuple(line))
+                    line = []
+                    continue
+
+                width = char_width(char)
+                if width:
+                    line.append((char, style))
+                    if width > 1:
+                        line.append(("", style))
+                    continue
+
+                if char.isprintable() and line:
+                    # Combining characters go along with the previous one.
+                    index = len(line) - 1 - (not line[-1][0])
+                    text, cell_style = line[index]
+                    line[index] = (text + char, cell_style)
+
+        lines.append(tuple(line))
+        return cls(tuple(lines))
+
+    @classmethod
+    def from_ansi(cls, text: Text) -> Screen:
+        """Build a screen from an ANSI string."""
+        return cls.from_instructions(Ansi(text).instructions())
+
+
+def _segments(old: Line, new: Line) -> List[Tuple[int, int]]:
+    """Return the ranges of columns of a line that have to be written."""
+    segments: List[Tuple[int, int]] = []
+    for column, cell in enumerate(new):
+        if column < len(old) and old[column] == cell:
+            continue
+
+        start = column
+        if not cell[0] and start:
+            # Never start in the middle of a wide character.
+            start -= 1
+        if segments and start - segments[-1][1] < _MOVE_COST:
+            # Rewriting a short gap is cheaper than moving over it.
+            start = segments.pop()[0]
+        segments.append((start, column + 1))
+
+    # Never end in the middle of a wide character either.
+    return [
+        (start, end + 1 if end < len(new) and not new[end][0] else end)
+        for start, end in segments
+    ]
+
+
+class _Renderer:
+    """Keep track of the terminal state while rendering differences."""
+
+    def __init__(self) -> None:
+        self.items: List[Instruction | Text] = []
+        self.style = DEFAULT
+        # Unknown until the first movement
+        self.position: Optional[Tuple[int, int]] = None
+
+    def move(self, row: int, column: int) -> None:
+        """Move the cursor with the shortest relative movements."""
+        if self.position == (row, column):
+            return
+
+        if self.position is None:
+            self.items.append(SetCursor(CursorMove.to_home()))
+            self.position = (0, 0)
+
+        current_row, current_column = self.position
+        if row != current_row:
+            self.items.append(SetCursor(CursorMove.down(row - current_row)))
+            if column == current_column:
+                # Vertical movements keep the column.
+                self.position = (row, column)
+                return
+            # Going back to the first column is the safest (and usually the
+            # shortest) option after changing lines, as we don't know whether
+            # the cursor is waiting to wrap at the end of the line.
+            self.items.append("\r")
+            current_column = 0
+
+        if column != current_column:
+            forward = SetCursor(CursorMove.right(column - current_column))
+            back = ["\r"]
+            if column:
+                back.append(SetCursor(CursorMove.right(column)))
+            self.items.extend(
+                back if len(encode(back)) < len(encode([forward])) else [forward]
+            )
+        self.position = (row, column)
+
+    def write(self, cells: Sequence[Cell]) -> None:
+        """Write cells at the cursor position."""
+        assert self.position is not None, "cursor position is unknown"
+        for text, style in cells:
+            if not text:
+                continue
+            if style != self.style:
+                self.items.extend(self.style.transition(style))
+                self.style = style
+            self.items.append(text)
+        row, column = self.position
+        self.position = (row, column + len(cells))
+
+    def clear(self, region: Clear) -> None:
+        """Clear a screen region with the default style."""
+        self.reset()
+        self.items.append(SetClear(region))
+
+    def reset(self) -> None:
+        """Go back to the default style."""
+        if self.style:
+            self.items.extend(self.style.transition(DEFAULT))
+            self.style = DEFAULT
+
+
+def diff(old: Screen, new: Screen) -> List[Instruction | Text]:
+    r"""
+    Return the instructions and text that change a screen into another.
+
+    Only the cells that changed are written, and cursor movements, style
+    changes and clearing are kept to a minimum. Short unchanged gaps are
+    rewritten when that is shorter than moving the cursor over them.
+
+    The cursor position is unknown at first, so the first movement starts
+    from the home position. The terminal is assumed to be in the default
+    style at first, and is left in the default style afterwards.
+
+    Examples
+    --------
+    >>> diff(Screen.from_ansi("ab\ncd"),
+    ...      Screen.from_ansi("ab"))  # doctest: +NORMALIZE_WHITESPACE
+    [SetCursor(move=CursorMove(x=0, y=0, relative=False)),
+     SetCursor(move=CursorMove(x=0, y=1, relative=True)),
+     SetClear(region=<Clear.SCREEN_AFTER: 0>)]
+    """
+    renderer = _Renderer()
+    for row, new_line in enumerate(new.lines):
+        old_line = old.lines[row] if row < len(old.lines) else ()
+        for start, end in _segments(old_line, new_line):
+            renderer.move(row, start)
+            renderer.write(new_line[start:end])
+        if len(old_line) > len(new_line):
+            renderer.move(row, len(new_line))
+            renderer.clear(Clear.LINE_AFTER)
+
+    if len(old.lines) > len(new.lines):
+        renderer.move(len(new.lines), 0)
+        renderer.clear(Clear.SCREEN_AFTER)
+
+    renderer.reset()
+    return renderer.items
+
+
+def render(old: Screen, new: Screen) -> Ansi:
+    """Return the ANSI string that changes a screen into another."""
+    return Ansi(encode(diff(old, new)))
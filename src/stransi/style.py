@@ -0,0 +1,183 @@
+"""The cumulative text style set by SGR instructions."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import FrozenSet, Hashable, List, Optional
+
+import ochre
+from ochre import Color
+
+from .attribute import Attribute, SetAttribute
+from .color import ColorRole, SetColor
+from .encode import _sgr, _sgr_params
+from .instruction import Instruction
+
+_INTENSITY: FrozenSet[Attribute] = frozenset({Attribute.BOLD, Attribute.DIM})
+
+
+def _color_key(color: Optional[Color]) -> Hashable:
+    """
+    Return a key that identifies how a color is encoded.
+
+    Colors from ochre compare equal if they look the same, but we care about
+    how they are written to the terminal (and they can't be compared to None).
+    """
+    if color is None:
+        return None
+    if isinstance(color, ochre.Ansi256):
+        return color.code
+    return tuple(color.rgb)
+
+
+@dataclass(frozen=True, eq=False)
+class Style:
+    r"""
+    The text style that is active at some point of an ANSI string.
+
+    Only attributes that are "on" are stored, and colors are None when the
+    terminal default is used.
+
+    Examples
+    --------
+    >>> from stransi import Ansi
+    >>> style = Style()
+    >>> for instruction in Ansi("\x1b[1;31mHello").instructions():
+    ...     style = style.apply(instruction)
+    >>> style.instructions()  # doctest: +NORMALIZE_WHITESPACE
+    [SetAttribute(attribute=<Attribute.BOLD: 1>),
+     SetColor(role=<ColorRole.FOREGROUND: 30>, color=Ansi256(code=1))]
+    >>> style.escape()
+    '\x1b[1;31m'
+    """
+
+    attributes: FrozenSet[Attribute] = frozenset()
+    foreground: Optional[Color] = None
+    background: Optional[Color] = None
+    _key: Hashable = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        """Compute the comparison key of the style."""
+        object.__setattr__(
+            self,
+            "_key",
+            (
+                self.attributes,
+                _color_key(self.foreground),
+                _color_key(self.background),
+            ),
+        )
+
+    def __eq__(self, other: object) -> bool:
+        """Return True if both styles are encoded the same way."""
+        if not isinstance(other, Style):
+            return NotImplemented
+        return self._key == other._key
+
+    def __hash__(self) -> int:
+        """Return the hash of the style."""
+        return hash(self._key)
+
+    def __bool__(self) -> bool:
+        """Return True if this is not the default style."""
+        return self._key != _DEFAULT_KEY
+
+    def apply(self, instruction: Instruction) -> Style:
+        """
+        Return the style that results from applying an instruction.
+
+        Instructions that don't affect the style are ignored.
+        """
+        if isinstance(instruction, SetAttribute):
+            attribute = instruction.attribute
+            if attribute is Attribute.NORMAL:
+                return DEFAULT
+            if attribute is Attribute.NEITHER_BOLD_NOR_DIM:
+                attributes = self.attributes - _INTENSITY
+            elif attribute.is_off():
+                attributes = self.attributes - {Attribute(attribute.value - 20)}
+            else:
+                attributes = self.attributes | {attribute}
+            return Style(attributes, self.foreground, self.background)
+
+        if isinstance(instruction, SetColor):
+            if instruction.role is ColorRole.FOREGROUND:
+                return Style(self.attributes, instruction.color, self.background)
+            return Style(self.attributes, self.foreground, instruction.color)
+
+        return self
+
+    def instructions(self) -> List[Instruction]:
+        """Return the instructions that set this style from the default one."""
+        return DEFAULT._changes(self)
+
+    def transition(self, target: Style, reset: bool = True) -> List[Instruction]:
+        r"""
+        Return the shortest instructions that change this style into another.
+
+        If `reset` is False, the instructions never start with a reset (which
+        would also turn off anything a style doesn't keep track of, like the
+        SGR parameters that aren't supported).
+
+        Examples
+        --------
+        >>> bold = Style(frozenset({Attribute.BOLD}))
+        >>> bold.transition(Style())
+        [SetAttribute(attribute=<Attribute.NORMAL: 0>)]
+        >>> bold.transition(Style(), reset=False)
+        [SetAttribute(attribute=<Attribute.NEITHER_BOLD_NOR_DIM: 22>)]
+        >>> bold.transition(Style(frozenset({Attribute.BOLD, Attribute.ITALIC})))
+        [SetAttribute(attribute=<Attribute.ITALIC: 3>)]
+        """
+        if self == target:
+            return []
+        changes = self._changes(target)
+        if not reset:
+            return changes
+        full = [SetAttribute(Attribute.NORMAL), *DEFAULT._changes(target)]
+        if len(_escape(full)) < len(_escape(changes)):
+            return full
+        return changes
+
+    def escape(self, previous: Optional[Style] = None) -> str:
+        """
+        Return the escape sequence that sets this style.
+
+        The sequence is the shortest one that changes the previous style (the
+        default one if not given) into this one.
+        """
+        return _escape((previous or DEFAULT).transition(self))
+
+    def _changes(self, target: Style) -> List[Instruction]:
+        """Return the instructions that incrementally change into another style."""
+        added = target.attributes - self.attributes
+        removed = self.attributes - target.attributes
+
+        instructions: List[Instruction] = []
+        if removed & _INTENSITY:
+            # There's no way of turning off bold or dim alone.
+            instructions.append(SetAttribute(Attribute.NEITHER_BOLD_NOR_DIM))
+            removed -= _INTENSITY
+            added |= target.attributes & _INTENSITY
+        instructions.extend(
+            SetAttribute(Attribute(a.value + 20))
+            for a in sorted(removed, key=lambda a: a.value)
+        )
+        instructions.extend(
+            SetAttribute(a) for a in sorted(added, key=lambda a: a.value)
+        )
+
+        if _color_key(self.foreground) != _color_key(target.foreground):
+            instructions.append(SetColor(ColorRole.FOREGROUND, target.foreground))
+        if _color_key(self.background) != _color_key(target.background):
+            instructions.append(SetColor(ColorRole.BACKGROUND, target.background))
+        return instructions
+
+
+def _escape(instructions: List[Instruction]) -> str:
+    """Encode SGR instructions as a single escape sequence."""
+    return _sgr(p for i in instructions for p in _sgr_params(i))
+
+
+DEFAULT = Style()
+_DEFAULT_KEY = DEFAULT._key
@@ -0,0 +1,210 @@
+"""Transformations of the visible text of ANSI strings."""
+
+from __future__ import annotations
+
+import re
+from typing import (
+    Callable,
+    Iterable,
+    Iterator,
+    List,
+    Match,
+    Optional,
+    Pattern,
+    Text,
+    Tuple,
+    Union,
+)
+
+from .ansi import Ansi
+
+# What a match is replaced with: a template (as in `re.sub`) or a function
+Replacement = Union[Text, Callable[[Match[Text]], Text]]
+
+# Any control sequence (parameter bytes, intermediate bytes and a final byte),
+# including the ones `Ansi.PATTERN` doesn't match, like private modes
+_ESCAPE = re.compile(r"\N{ESC}\[[0-?]*[ -/]*[@-~]")
+
+
+def _split(text: Text) -> Tuple[Text, List[Tuple[int, Text]]]:
+    """Split text into its visible text and escapes (with their offsets in it)."""
+    visible: List[Text] = []
+    escapes: List[Tuple[int, Text]] = []
+    offset = end = 0
+    for match in _ESCAPE.finditer(text):
+        visible.append(text[end : match.start()])  # noqa: E203
+        offset += match.start() - end
+        escapes.append((offset, match.group()))
+        end = match.end()
+    visible.append(text[end:])
+    return "".join(visible), escapes
+
+
+def transform(function: Callable[[Text], Text], text: Text) -> Ansi:
+    r"""
+    Apply a function to every piece of visible text, keeping the escapes.
+
+    All control sequences are kept as they are, even those that aren't
+    supported otherwise.
+
+    Examples
+    --------
+    >>> transform(str.upper, "\x1b[1mHello\x1b[m, world!")
+    Ansi('\x1b[1mHELLO\x1b[m, WORLD!')
+    >>> transform(str.upper, "\x1b[?25lhi")
+    Ansi('\x1b[?25lHI')
+    """
+    pieces: List[Text] = []
+    end = 0
+    for match in _ESCAPE.finditer(text):
+        if match.start() > end:
+            pieces.append(function(text[end : match.start()]))  # noqa: E203
+        pieces.append(match.group())
+        end = match.end()
+    if end < len(text) or not end:
+        pieces.append(function(text[end:]))
+    return Ansi("".join(pieces))
+
+
+class Substitution:
+    r"""
+    A regular expression substitution on the visible text of ANSI strings.
+
+    Matches are searched in the visible text, so they can span several pieces
+    of text with escape sequences in between. A replacement is written in the
+    style of the beginning of its match, and the escape sequences within the
+    match are kept right after it, so the style of what follows is unchanged.
+
+    At most `count` matches are replaced (all of them if it is zero), over
+    all the texts the substitution is applied to.
+
+    Examples
+    --------
+    >>> redact = Substitution(r"secret", "******")
+    >>> redact("my \x1b[1msec\x1b[31mret\x1b[m is safe")
+    Ansi('my \x1b[1m******\x1b[31m\x1b[m is safe')
+    """
+
+    def __init__(
+        self, pattern: Text | Pattern[Text], repl: Replacement, count: int = 0
+    ) -> None:
+        """Create a substitution of a pattern."""
+        self.pattern = re.compile(pattern)
+        self.repl = repl
+        self.count = count
+        # Number of substitutions left, if limited
+        self._remaining: Optional[int] = count if count else None
+
+    def __call__(self, text: Text) -> Ansi:
+        """Apply the substitution to an ANSI string."""
+        if self._remaining == 0:
+            return Ansi(text)
+
+        visible, escapes = _split(text)
+        pieces: List[Text] = []
+        index = position = 0
+        for match in self.pattern.finditer(visible):
+            if self._remaining is not None:
+                if not self._remaining:
+                    break
+                self._remaining -= 1
+            start, end = match.span()
+            index = _extend(pieces, visible, escapes, index, position, start)
+            pieces.append(self._replacement(match))
+            while index < len(escapes) and escapes[index][0] < end:
+                pieces.append(escapes[index][1])
+                index += 1
+            position = end
+        _extend(pieces, visible, escapes, index, position, len(visible))
+        return Ansi("".join(pieces))
+
+    def _replacement(self, match: Match[Text]) -> Text:
+        """Return the replacement of a match."""
+        if isinstance(self.repl, str):
+            return match.expand(self.repl)
+        return self.repl(match)
+
+
+def _extend(
+    pieces: List[Text],
+    visible: Text,
+    escapes: List[Tuple[int, Text]],
+    index: int,
+    start: int,
+    stop: int,
+) -> int:
+    """Add visible text and the escapes up to `stop`, return the next escape."""
+    while index < len(escapes) and escapes[index][0] <= stop:
+        offset, escape = escapes[index]
+        pieces.append(visible[start:offset])
+        pieces.append(escape)
+        start = offset
+        index += 1
+    pieces.append(visible[start:stop])
+    return index
+
+
+def sub(
+    pattern: Text | Pattern[Text], repl: Replacement, text: Text, count: int = 0
+) -> Ansi:
+    r"""
+    Replace matches of a pattern in the visible text of an ANSI string.
+
+    See `Substitution` for how matches across escape sequences are handled.
+
+    Examples
+    --------
+    >>> sub(r"\d+", "#", "\x1b[32m12\x1b[m apples, \x1b[1m3\x1b[m pears")
+    Ansi('\x1b[32m#\x1b[m apples, \x1b[1m#\x1b[m pears')
+    """
+    return Substitution(pattern, repl, count)(text)
+
+
+class Stream:
+    r"""
+    Apply a transformation to ANSI text as it is read, one line at a time.
+
+    The transformation gets complete lines (so escape sequences are never
+    split) and has to return them in the same order. Matches of a
+    `Substitution` can then span escape sequences, but not line breaks.
+
+    Examples
+    --------
+    >>> stream = Stream(Substitution("cat", "dog"))
+    >>> stream.feed("\x1b[1mc")
+    ''
+    >>> stream.feed("at\x1b[m\nca")
+    '\x1b[1mdog\x1b[m\n'
+    >>> stream.close()
+    'ca'
+    """
+
+    def __init__(self, transformation: Callable[[Text], Text]) -> None:
+        """Create a stream that applies a transformation."""
+        self.transformation = transformation
+        self._held: List[Text] = []
+
+    def feed(self, chunk: Text) -> Text:
+        """Take a chunk of text and return whatever is transformed so far."""
+        end = chunk.rfind("\n") + 1
+        if not end:
+            self._held.append(chunk)
+            return ""
+        self._held.append(chunk[:end])
+        lines = "".join(self._held)
+        self._held = [chunk[end:]] if end < len(chunk) else []
+        return str(self.transformation(lines))
+
+    def close(self) -> Text:
+        """Transform whatever is left."""
+        rest = "".join(self._held)
+        self._held = []
+        return str(self.transformation(rest)) if rest else ""
+
+    def rewrite(self, chunks: Iterable[Text]) -> Iterator[Text]:
+        """Transform chunks of text (e.g., the lines of a file) as they come."""
+        for chunk in chunks:
+            if output := self.feed(chunk):
+                yield output
+        if output := self.close():
+            yield output
@@ -0,0 +1,178 @@
+"""A buffered writer that keeps track of the terminal style."""
+
+from __future__ import annotations
+
+from types import TracebackType
+from typing import Iterable, List, Optional, Text, TextIO, Type, Union
+
+from .ansi import Ansi
+from .attribute import Attribute, SetAttribute
+from .encode import encode, issgr
+from .instruction import Instruction
+from .style import DEFAULT, Style
+from .unsupported import Unsupported
+
+# What can be written: ANSI strings, instructions, or any sequence of them
+Writable = Union[Text, Instruction, Iterable[Union[Instruction, Text]]]
+
+
+class Writer:
+    r"""
+    Write styled text to a stream, skipping escape sequences that don't matter.
+
+    Style changes are delayed until there's text to write, and then written as
+    the shortest transition from the style the terminal is in. Anything that
+    wouldn't change the style (like a reset followed by the very same style)
+    is never written. Output is kept in a buffer, which is written to the
+    stream when it grows past `buffer_size` characters, on line breaks (if
+    `line_buffering` is True) and on `flush()`.
+
+    SGR parameters that aren't supported (e.g., strikethrough) are written as
+    they come. Since only a reset turns them off, style changes are never
+    written as a reset while they may be active, and resets are always written
+    then.
+
+    The terminal is assumed to be in the default style at first. Leaving the
+    writer as a context manager goes back to the default style and flushes.
+
+    Examples
+    --------
+    >>> import io
+    >>> stream = io.StringIO()
+    >>> with Writer(stream) as writer:
+    ...     writer.write("\x1b[1mHello\x1b[m")
+    ...     writer.write("\x1b[1m, world\x1b[m")
+    ...     writer.write("!")
+    >>> stream.getvalue()
+    '\x1b[1mHello, world\x1b[m!'
+    """
+
+    def __init__(
+        self, stream: TextIO, buffer_size: int = 8192, line_buffering: bool = True
+    ) -> None:
+        """Wrap a text stream."""
+        if buffer_size < 1:
+            raise ValueError(f"buffer_size must be positive, got {buffer_size}")
+        self.stream = stream
+        self.buffer_size = buffer_size
+        self.line_buffering = line_buffering
+        # Style the terminal is in, and style the next text should be in
+        self.style = DEFAULT
+        self._target = DEFAULT
+        # Whether unsupported SGR parameters may be active, and whether they
+        # have to be turned off (with a reset) before the next text
+        self._unsupported = False
+        self._reset = False
+        self._buffer: List[Text] = []
+        self._size = 0
+
+    def write(self, item: Writable) -> None:
+        """Write an ANSI string, an instruction, or a sequence of them."""
+        if isinstance(item, str):
+            if "\N{ESC}" in item:
+                self._write_items(Ansi(item).instructions())
+            else:
+                self._write_text(item)
+        elif isinstance(item, Instruction):
+            self._write_items([item])
+        else:
+            self._write_items(item)
+
+    def set_style(self, style: Style) -> None:
+        """Set the style of the text written next."""
+        self._target = style
+
+    def reset(self) -> None:
+        """Go back to the default style right away."""
+        self._target = DEFAULT
+        self._reset = self._unsupported
+        self._sync()
+
+    def flush(self) -> None:
+        """Write the buffer to the stream and flush it."""
+        self._flush()
+        self.stream.flush()
+
+    def __enter__(self) -> Writer:
+        """Use the writer as a context manager."""
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        """Go back to the default style and flush."""
+        self.reset()
+        self.flush()
+
+    def _write_items(self, items: Iterable[Instruction | Text]) -> None:
+        """Write text and instructions."""
+        # Unsupported SGR instructions, which have to be encoded together
+        unsupported: List[Instruction] = []
+        for item in items:
+            if isinstance(item, Unsupported) and item.token.kind == "m":
+                unsupported.append(item)
+                continue
+            if unsupported:
+                self._write_instructions(unsupported)
+                unsupported = []
+
+            if isinstance(item, str):
+                self._write_text(item)
+            elif issgr(item):
+                self._target = self._target.apply(item)
+                if (
+                    isinstance(item, SetAttribute)
+                    and item.attribute is Attribute.NORMAL
+                ):
+                    self._reset = self._unsupported
+            else:
+                self._write_instructions([item])
+        if unsupported:
+            self._write_instructions(unsupported)
+
+    def _write_instructions(self, instructions: List[Instruction]) -> None:
+        """Write instructions that don't change the style right away."""
+        # They may depend on the style (e.g., clearing uses the background
+        # color), so it has to be up to date.
+        self._sync()
+        self._append(encode(instructions))
+        first = instructions[0]
+        if isinstance(first, Unsupported) and first.token.kind == "m":
+            self._unsupported = True
+
+    def _write_text(self, text: Text) -> None:
+        """Write text in the target style."""
+        if not text:
+            return
+        self._sync()
+        self._append(text)
+        if self.line_buffering and "\n" in text:
+            self.flush()
+
+    def _sync(self) -> None:
+        """Change the style of the terminal into the target one, if needed."""
+        if self._reset:
+            reset = SetAttribute(Attribute.NORMAL)
+            self._append(encode([reset, *self._target.instructions()]))
+            self._unsupported = self._reset = False
+        elif self._target != self.style:
+            reset = not self._unsupported
+            self._append(encode(self.style.transition(self._target, reset)))
+        self.style = self._target
+
+    def _append(self, text: Text) -> None:
+        """Add text to the buffer, writing it out if it gets too big."""
+        self._buffer.append(text)
+        self._size += len(text)
+        if self._size >= self.buffer_size:
+            self._flush()
+
+    def _flush(self) -> None:
+        """Write the buffer to the stream."""
+        if self._buffer:
+            self.stream.write("".join(self._buffer))
+            self._buffer = []
+            self._size = 0
@@ -0,0 +1,187 @@
+"""
+Reference implementations of the parser.
+
+These are frozen copies of the original (straightforward) implementations,
+down to the pattern, the token split and the code sets they use, so that
+changes to the parser can't change them too. Faster backends are checked
+against them, item for item.
+"""
+
+from __future__ import annotations
+
+import re
+from typing import Iterator, Text
+
+import ochre
+
+from stransi import Escape, SetAttribute, SetClear, SetColor, SetCursor, Unsupported
+from stransi.attribute import Attribute
+from stransi.clear import Clear
+from stransi.color import ColorRole
+from stransi.cursor import CursorMove
+from stransi.instruction import Instruction
+from stransi.token import Token
+
+PATTERN = re.compile(r"(\N{ESC}\[[\d;]*[a-zA-Z])")
+ATTRIBUTE_CODES = {0, 1, 2, 3, 4, 5, 7, 8, 22, 23, 24, 25, 27, 28}
+FOREGROUND_CODES = set(range(30, 40)) | set(range(90, 98))
+BACKGROUND_CODES = set(range(40, 50)) | set(range(100, 108))
+COLOR_CODES = FOREGROUND_CODES | BACKGROUND_CODES
+
+
+def reference_escapes(text: Text) -> Iterator[Escape | Text]:
+    """Yield ANSI escapes and text in the order they appear."""
+    for match in PATTERN.split(text):
+        if not match:
+            continue
+
+        if not match.startswith("\N{ESC}["):
+            yield match
+            continue
+        yield Escape(match)
+
+
+def reference_tokens(escape: Text) -> Iterator[Token]:
+    """Yield individual tokens from an escape sequence."""
+    assert escape.startswith("\N{ESC}["), f"{escape!r} is not an escape sequence"
+    kind = escape[-1]
+    for param in escape[2:-1].split(";"):
+        if not param:
+            yield Token(kind=kind, data=0)
+            continue
+        yield Token(kind=kind, data=int(param))
+
+
+def reference_decode(escape: Text) -> Iterator[Instruction]:  # noqa: C901
+    """Decode a single escape sequence with a chain of conditions."""
+    tokens = reference_tokens(escape)
+    while token := next(tokens, None):
+        if token.issgr():
+            if token.data in ATTRIBUTE_CODES:
+                yield SetAttribute(Attribute(token.data))
+                continue
+
+            if token.data in COLOR_CODES:
+                if token.data in FOREGROUND_CODES:
+                    role = ColorRole.FOREGROUND
+                elif token.data in BACKGROUND_CODES:
+                    role = ColorRole.BACKGROUND
+
+                if token.data in {38, 48}:
+                    if not (color_spec_token := next(tokens, None)):
+                        yield Unsupported(token)
+                        continue
+                    if color_spec_token.data == 5:
+                        # 256-color support
+                        if not (color_index_token := next(tokens, None)):
+                            yield Unsupported(token)
+                            yield Unsupported(color_spec_token)
+                            continue
+                        color = ochre.Ansi256(color_index_token.data)
+                    elif color_spec_token.data == 2:
+                        # 24-bit color support
+                        if not (red_token := next(tokens, None)):
+                            yield Unsupported(token)
+                            yield Unsupported(color_spec_token)
+                            continue
+                        if not (green_token := next(tokens, None)):
+                            yield Unsupported(token)
+                            yield Unsupported(color_spec_token)
+                            yield Unsupported(red_token)
+                            continue
+                        if not (blue_token := next(tokens, None)):
+                            yield Unsupported(token)
+                            yield Unsupported(color_spec_token)
+                            yield Unsupported(red_token)
+                            yield Unsupported(green_token)
+                            continue
+                        color = ochre.RGB(
+                            red_token.data / 255,
+                            green_token.data / 255,
+                            blue_token.data / 255,
+                        )
+                    else:
+                        yield Unsupported(token)
+                        yield Unsupported(color_spec_token)
+                        continue
+                elif token.data in {39, 49}:
+                    # Default color
+                    color = None
+                else:
+                    # 8-color support
+
+                    # The value of role is the index of the first color in
+                    # the corresponding palette, that's why it works.
+                    color_index = token.data - role.value
+                    if token.data >= 90:
+                        # Bright colors
+                        color_index -= 52
+
+                    color = ochre.Ansi256(color_index)
+
+                yield SetColor(role=role, color=color)
+                continue
+
+        if token.kind == "A":
+            yield SetCursor(CursorMove.up(token.data if token.data else 1))
+            continue
+
+        if token.kind == "B":
+            yield SetCursor(CursorMove.down(token.data if token.data else 1))
+            continue
+
+        if token.kind == "C":
+            yield SetCursor(CursorMove.right(token.data if token.data else 1))
+            continue
+
+        if token.kind == "D":
+            yield SetCursor(CursorMove.left(token.data if token.data else 1))
+            continue
+
+        if token.kind in {"H", "f"}:
+            try:
+                next_data = next(tokens).data
+            except StopIteration:
+                next_data = 0
+            x = token.data if token.data else 1
+            y = next_data if next_data else 1
+            # ANSI escape sequences are 1-based, but we want 0-based.
+            yield SetCursor(CursorMove.to(x - 1, y - 1))
+            continue
+
+        if token.kind == "J":
+            if token.data == 0:
+                yield SetClear(Clear.SCREEN_AFTER)
+                continue
+
+            if token.data == 1:
+                yield SetClear(Clear.SCREEN_BEFORE)
+                continue
+
+            if token.data == 2:
+                yield SetClear(Clear.SCREEN)
+                continue
+
+        if token.kind == "K":
+            if token.data == 0:
+                yield SetClear(Clear.LINE_AFTER)
+                continue
+
+            if token.data == 1:
+                yield SetClear(Clear.LINE_BEFORE)
+                continue
+
+            if token.data == 2:
+                yield SetClear(Clear.LINE)
+                continue
+
+        yield Unsupported(token)
+
+
+def reference_instructions(text: Text) -> Iterator[Instruction | Text]:
+    """Yield ANSI instructions and text in the order they appear."""
+    for escape in reference_escapes(text):
+        if not isinstance(escape, Escape):
+            yield escape
+            continue
+        yield from reference_decode(escape)
@@ -57,3 +57,70 @@ def test_ansi_can_be_iterated(example: Ansi):
         "World!",
         SetAttribute(Attribute.NORMAL),
     ]
+
+
+def test_ansi_can_be_wrapped():
+    """Ansi can be wrapped, closing and re-opening styles at line breaks."""
+    assert Ansi("\x1b[1mab\x1b[31mcdef\x1b[mgh\nxy").wrap(3) == [
+        "\x1b[1mab\x1b[31mc\x1b[m",
+        "\x1b[1;31mdef\x1b[m",
+        "gh",
+        "xy",
+    ]
+    assert Ansi("").wrap(3) == [""]
+    assert Ansi("abc\n").wrap(2) == ["ab", "c", ""]
+
+
+def test_ansi_wrap_measures_display_width():
+    """Wide characters take two columns when wrapping."""
+    assert Ansi("中文字abc").wrap(3) == ["中", "文", "字a", "bc"]
+    assert Ansi("中a").wrap(1) == ["中", "a"]
+    assert Ansi("中\x1b[1mab").wrap(1) == [
+        "中\x1b[1m\x1b[m",
+        "\x1b[1ma\x1b[m",
+        "\x1b[1mb\x1b[m",
+    ]
+
+
+def test_ansi_wrap_keeps_other_escapes():
+    """Non-SGR escapes are kept and force the style to be re-opened."""
+    assert Ansi("\x1b[1mab\n\x1b[2Jcd").wrap(2) == [
+        "\x1b[1mab\x1b[m",
+        "\x1b[1m\x1b[2Jcd\x1b[m",
+    ]
+
+
+def test_ansi_wrap_keeps_unsupported_sgr():
+    """Unsupported SGR parameters are closed and re-opened like the style."""
+    assert Ansi("\x1b[9mabcdef\x1b[m").wrap(3) == [
+        "\x1b[9mabc\x1b[m",
+        "\x1b[9mdef\x1b[m",
+    ]
+    assert Ansi("\x1b[1;9mab\x1b[22mcd\x1b[mef").wrap(2) == [
+        "\x1b[1;9mab\x1b[22m\x1b[m",
+        "\x1b[9mcd\x1b[m",
+        "ef",
+    ]
+
+
+def test_ansi_wrap_rejects_bad_width():
+    """Wrapping requires a positive width."""
+    with pytest.raises(ValueError):
+        Ansi("abc").wrap(0)
+
+
+def test_ansi_can_be_truncated():
+    """Ansi can be truncated to a display width."""
+    assert Ansi("\x1b[31mHello\x1b[m, world!").truncate(4) == "\x1b[31mHel…\x1b[m"
+    assert Ansi("\x1b[1mabcdef").truncate(5, "...") == "\x1b[1mab...\x1b[m"
+    assert Ansi("中文字abc").truncate(4) == "中…"
+    assert Ansi("Hello, world!").truncate(7, "") == "Hello, "
+
+    assert Ansi("\x1b[9mabcdef").truncate(4) == "\x1b[9mabc…\x1b[m"
+    assert Ansi("\x1b[9mab\x1b[mcdef").truncate(4) == "\x1b[9mab\x1b[mc…"
+
+    example = Ansi("\x1b[31mHello\x1b[m")
+    assert example.truncate(5) is example
+
+    with pytest.raises(ValueError):
+        example.truncate(2, "...")
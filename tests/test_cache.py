@@ -0,0 +1,134 @@
+"""Tests for the ParseCache class."""
+
+from __future__ import annotations
+
+import os
+from pathlib import Path
+from typing import Text
+
+import pytest
+
+from stransi import Ansi
+from stransi.cache import ParseCache, _read_int, _write_int
+
+EXAMPLES = [
+    "",
+    "Hello, world!",
+    "\x1b[0;31;1mHello\033[m, \x1b[32mWorld!\x1b[0m",
+    "\x1b[38;5;200;48;2;10;20;30mRGB\x1b[39;49m",
+    "\x1b[2J\x1b[3;4H\x1b[2A\x1b[K\x1b[38;2m\x1b[99999999999999999999z",
+    "\x1b[1m中文\x1b[m",
+]
+
+
+@pytest.fixture
+def cache(tmp_path: Path) -> ParseCache:
+    """Return an empty cache."""
+    return ParseCache(tmp_path / "cache")
+
+
+@pytest.mark.parametrize("value", [0, 1, -1, 63, -64, 64, 2**70, -(2**70)])
+def test_ints_round_trip(value: int):
+    """Variable-length ints can be read back."""
+    buffer = bytearray()
+    _write_int(buffer, value)
+    assert _read_int(bytes(buffer), 0) == (value, len(buffer))
+
+
+@pytest.mark.parametrize("text", EXAMPLES)
+def test_cache_round_trips(cache: ParseCache, text: Text):
+    """Cached results are the same as parsing."""
+    expected = list(Ansi(text).instructions())
+    assert cache.get(text) is None
+    assert cache.instructions(text) == expected
+    assert cache.get(text) == expected
+
+
+def test_cache_depends_on_content(cache: ParseCache):
+    """Different texts have different keys."""
+    cache.put("\x1b[1mHello")
+    assert cache.get("\x1b[2mHello") is None
+    assert cache.key("a") != cache.key("b")
+
+
+def test_cache_drops_corrupt_entries(cache: ParseCache):
+    """Corrupt entries are treated as missing."""
+    cache.put("\x1b[1mHello")
+    path = cache._path("\x1b[1mHello")
+    path.write_bytes(ParseCache.MAGIC + b"\xff")
+    assert cache.get("\x1b[1mHello") is None
+    assert not path.exists()
+
+
+def test_cache_evicts_least_recently_used(cache: ParseCache):
+    """The cache doesn't grow beyond its maximum size."""
+    texts = [f"\x1b[1mline {i}" for i in range(10)]
+    for i, text in enumerate(texts):
+        cache.put(text)
+        os.utime(cache._path(text), (i, i))
+    size = cache._path(texts[0]).stat().st_size
+
+    cache.max_size = 5 * size
+    cache.evict()
+    assert [cache.get(text) is not None for text in texts] == [False] * 5 + [True] * 5
+
+    cache.clear()
+    assert not list(cache.directory.iterdir())
+
+
+def test_cache_scans_only_when_full(cache: ParseCache, monkeypatch):
+    """Writes only scan the directory once the size estimate is too big."""
+    texts = [f"\x1b[1mline {i}" for i in range(100)]
+    cache.put(texts[0])
+    size = cache._path(texts[0]).stat().st_size
+    cache.max_size = 40 * size
+
+    scans = []
+    entries = cache._entries
+    monkeypatch.setattr(cache, "_entries", lambda: scans.append(1) or entries())
+    for text in texts[1:]:
+        cache.put(text)
+    assert 0 < len(scans) <= len(texts) // 5
+    assert len(list(cache.directory.glob("*.bin"))) <= 40
+
+
+def test_cache_get_survives_concurrent_eviction(cache: ParseCache, monkeypatch):
+    """Entries evicted right after being read are still returned."""
+    cache.put("\x1b[1mHello")
+
+    def evicted(path, *args):
+        raise FileNotFoundError(path)
+
+    monkeypatch.setattr(os, "utime", evicted)
+    assert cache.get("\x1b[1mHello") == list(Ansi("\x1b[1mHello").instructions())
+
+
+def test_cache_stores_rgb_colors_exactly(cache: ParseCache):
+    """RGB colors take a few bytes and come back exactly as parsed."""
+    text = "\x1b[38;2;1;128;255m"
+    entry = cache._path(text)
+    cache.put(text)
+    assert entry.stat().st_size < len(ParseCache.MAGIC) + 12
+    assert cache.get(text) == list(Ansi(text).instructions())
+
+
+def test_cache_removes_temporary_files(cache: ParseCache, monkeypatch):
+    """Temporary files of failed writes and stale ones are removed."""
+
+    def fail(*args):
+        raise OSError("disk full")
+
+    with monkeypatch.context() as context:
+        context.setattr(os, "replace", fail)
+        with pytest.raises(OSError):
+            cache.put("\x1b[1mHello")
+    assert not list(cache.directory.iterdir())
+
+    stale = cache.directory / f"left{ParseCache.TEMPORARY_SUFFIX}"
+    fresh = cache.directory / f"writing{ParseCache.TEMPORARY_SUFFIX}"
+    stale.write_bytes(b"")
+    fresh.write_bytes(b"")
+    os.utime(stale, (0, 0))
+    cache.evict()
+    assert not stale.exists()
+    assert fresh.exists()
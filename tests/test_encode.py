@@ -0,0 +1,77 @@
+"""Tests for encoding instructions back into escape sequences."""
+
+from __future__ import annotations
+
+from typing import List
+
+import ochre
+from hypothesis import given
+from hypothesis import strategies as st
+
+from stransi import Ansi, SetAttribute, SetClear, SetColor, SetCursor
+from stransi.attribute import Attribute
+from stransi.clear import Clear
+from stransi.color import ColorRole
+from stransi.cursor import CursorMove
+from stransi.encode import encode
+from stransi.instruction import Instruction
+
+STEPS = st.integers(min_value=1, max_value=1000)
+INSTRUCTIONS = st.one_of(
+    st.builds(SetAttribute, st.sampled_from(list(Attribute))),
+    st.builds(
+        SetColor,
+        st.sampled_from(list(ColorRole)),
+        st.one_of(
+            st.none(),
+            st.builds(ochre.Ansi256, st.integers(min_value=0, max_value=255)),
+        ),
+    ),
+    st.builds(SetClear, st.sampled_from(list(Clear))),
+    st.builds(
+        SetCursor,
+        st.one_of(
+            st.builds(CursorMove.up, STEPS),
+            st.builds(CursorMove.down, STEPS),
+            st.builds(CursorMove.left, STEPS),
+            st.builds(CursorMove.right, STEPS),
+            st.builds(CursorMove.to, STEPS, STEPS),
+            st.just(CursorMove.to_home()),
+        ),
+    ),
+    st.text(alphabet="ab ", min_size=1),
+)
+SGR_ESCAPES = st.lists(
+    st.sampled_from([0, 1, 2, 5, 6, 31, 38, 48, 255]), min_size=1, max_size=6
+).map(lambda params: f"\x1b[{';'.join(map(str, params))}m")
+
+
+def test_encode_coalesces_sgr():
+    """Consecutive SGR instructions share a single escape sequence."""
+    assert encode(Ansi("\x1b[1m\x1b[31mHi\x1b[0m").instructions()) == (
+        "\x1b[1;31mHi\x1b[m"
+    )
+
+
+@given(instructions=st.lists(INSTRUCTIONS))
+def test_encode_round_trips(instructions: List[Instruction]):
+    """Encoded instructions are parsed back into the same instructions."""
+    parsed = list(Ansi(encode(instructions)).instructions())
+    # Adjacent pieces of text are parsed as a single one.
+    assert encode(parsed) == encode(instructions)
+    assert [i for i in parsed if not isinstance(i, str)] == [
+        i for i in instructions if not isinstance(i, str)
+    ]
+
+
+def test_encode_keeps_unsupported_sgr_together():
+    """Unsupported SGR parameters are not parsed again as supported ones."""
+    assert encode(Ansi("\x1b[38;5m").instructions()) == "\x1b[38;5m"
+    assert encode(Ansi("\x1b[38m\x1b[5m").instructions()) == "\x1b[38m\x1b[5m"
+
+
+@given(escapes=st.lists(SGR_ESCAPES))
+def test_encode_round_trips_sgr(escapes: List[str]):
+    """Decoded SGR escapes are encoded into the same instructions."""
+    instructions = list(Ansi("".join(escapes)).instructions())
+    assert list(Ansi(encode(instructions)).instructions()) == instructions
@@ -0,0 +1,170 @@
+"""
+Differential tests of alternative parse paths against the reference parser.
+
+Every parse path must give the same output as the reference implementation
+(or fail the same way) on adversarial inputs, item for item. Faster backends
+must also not be slower than the reference by more than a configured fraction,
+set through the `STRANSI_THROUGHPUT_THRESHOLD` environment variable.
+"""
+
+from __future__ import annotations
+
+import os
+import tempfile
+import timeit
+from typing import Callable, Dict, Iterable, List, Text, Type, Union
+
+import pytest
+from hypothesis import given
+from hypothesis import strategies as st
+
+from stransi import Ansi, Escape
+from stransi.cache import ParseCache
+from stransi.incremental import IncrementalAnsi
+from stransi.pipeline import Collect, Pipeline
+
+from ._reference import reference_decode, reference_escapes, reference_instructions
+
+# Maximum fraction a backend can be slower than the reference
+THRESHOLD = float(os.environ.get("STRANSI_THROUGHPUT_THRESHOLD", "0.5"))
+REPEATS = 7
+
+Parse = Callable[[Text], Iterable[object]]
+Outcome = Union[List[Text], Type[BaseException]]
+
+PARAMS = st.lists(
+    st.one_of(
+        st.sampled_from(["", "0", "1", "2", "5", "22", "38", "48", "39", "49"]),
+        st.integers(min_value=0, max_value=300).map(str),
+    ),
+    max_size=8,
+).map(";".join)
+ESCAPES = st.builds(
+    lambda params, final: f"\N{ESC}[{params}{final}",
+    PARAMS,
+    st.sampled_from("mmmmmABCDHfJKsuz"),
+)
+NOISE = st.sampled_from(["\N{ESC}", "\N{ESC}[", "[", ";", "1", "m", "\n", "\r"])
+INPUTS = st.lists(st.one_of(ESCAPES, NOISE, st.text(max_size=5)), max_size=20).map(
+    "".join
+)
+
+
+def _incremental_edits(text: Text) -> Iterable[object]:
+    """Parse by typing the text in two pieces, the second one first."""
+    incremental = IncrementalAnsi()
+    middle = len(text) // 2
+    incremental.edit(0, 0, text[middle:])
+    incremental.edit(0, 0, text[:middle])
+    return incremental.instructions()
+
+
+def _cached(text: Text) -> Iterable[object]:
+    """Parse through a round trip to the on-disk cache."""
+    with tempfile.TemporaryDirectory() as directory:
+        cache = ParseCache(directory)
+        cache.put(text)
+        return cache.get(text) or []
+
+
+def _pipeline_chunks(text: Text) -> Iterable[object]:
+    """Parse through a pipeline, fed a few characters at a time."""
+    pipeline = Pipeline(Collect(), batch_size=2)
+    for start in range(0, len(text), 3):
+        pipeline.feed(text[start : start + 3])  # noqa: E203
+    (items,) = pipeline.close()
+    # Pipelines may split pieces of text.
+    merged: List[object] = []
+    for item in items:
+        if isinstance(item, str) and merged and isinstance(merged[-1], str):
+            merged[-1] += item
+        else:
+            merged.append(item)
+    return merged
+
+
+INSTRUCTION_PATHS: Dict[Text, Parse] = {
+    "Ansi.instructions": lambda text: Ansi(text).instructions(),
+    "IncrementalAnsi": lambda text: IncrementalAnsi(text).instructions(),
+    "IncrementalAnsi.edit": _incremental_edits,
+    "ParseCache": _cached,
+    "Pipeline.feed": _pipeline_chunks,
+}
+ESCAPE_PATHS: Dict[Text, Parse] = {
+    "Ansi.escapes": lambda text: Ansi(text).escapes(),
+    "IncrementalAnsi": lambda text: IncrementalAnsi(text).escapes(),
+}
+
+CORPORA: Dict[Text, Text] = {
+    "sgr": "".join(
+        f"\x1b[{i % 2};{30 + i % 8};{40 + i % 8}m{i}\x1b[38;5;{i % 256}mx"
+        f"\x1b[48;2;{i % 256};0;{255 - i % 256}my\x1b[m "
+        for i in range(1000)
+    ),
+    "mixed": "".join(
+        f"\x1b[{i % 20};{i % 80}H\x1b[K\x1b[1;31mline {i}\x1b[m\x1b[2A\x1b[3C"
+        for i in range(1000)
+    ),
+    "plain": "Just some text without any escapes. " * 1000,
+}
+
+
+def _outcome(parse: Parse, text: Text) -> Outcome:
+    """Return the items of a parse (as text), or the error it raises."""
+    try:
+        return [repr(item) for item in parse(text)]
+    except Exception as error:
+        return type(error)
+
+
+def _best_time(parse: Parse, text: Text) -> float:
+    """Return the best time to parse a text completely."""
+    return min(timeit.repeat(lambda: list(parse(text)), number=1, repeat=REPEATS))
+
+
+@pytest.mark.parametrize("name", INSTRUCTION_PATHS)
+@given(text=INPUTS)
+def test_instructions_match_reference(name: Text, text: Text):
+    """Every instruction parse path matches the reference."""
+    expected = _outcome(reference_instructions, text)
+    assert _outcome(INSTRUCTION_PATHS[name], text) == expected
+
+
+@pytest.mark.parametrize("name", ESCAPE_PATHS)
+@given(text=INPUTS)
+def test_escapes_match_reference(name: Text, text: Text):
+    """Every escape split matches the reference."""
+    expected = _outcome(reference_escapes, text)
+    assert _outcome(ESCAPE_PATHS[name], text) == expected
+
+
+@given(escape=ESCAPES)
+def test_decoder_matches_reference(escape: Text):
+    """Decoding single escapes matches the reference decoder."""
+    expected = _outcome(lambda text: reference_decode(Escape(text)), escape)
+    assert _outcome(lambda text: Escape(text).instructions(), escape) == expected
+
+
+@pytest.mark.parametrize("corpus", CORPORA)
+def test_instructions_throughput(corpus: Text):
+    """Parsing is not slower than the reference beyond the threshold."""
+    text = CORPORA[corpus]
+    reference = _best_time(reference_instructions, text)
+    candidate = _best_time(lambda text: Ansi(text).instructions(), text)
+    assert candidate <= reference * (1 + THRESHOLD)
+
+
+@pytest.mark.parametrize(
+    "corpus", [name for name, text in CORPORA.items() if "\x1b[" in text]
+)
+def test_decoder_throughput(corpus: Text):
+    """Decoding is not slower than the reference beyond the threshold."""
+    escapes = [e for e in Ansi(CORPORA[corpus]).escapes() if isinstance(e, Escape)]
+
+    def reference(_: Text) -> Iterable[object]:
+        return [i for escape in escapes for i in reference_decode(escape)]
+
+    def candidate(_: Text) -> Iterable[object]:
+        return [i for escape in escapes for i in escape.instructions()]
+
+    assert _best_time(candidate, "") <= _best_time(reference, "") * (1 + THRESHOLD)
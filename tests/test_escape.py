@@ -113,6 +113,42 @@ def test_faulty_escapes(text, expected):
     assert _instr(text) == expected
 
 
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        (
+            "\033[38;0;1m",
+            [
+                Unsupported(Token(kind="m", data=38)),
+                Unsupported(Token(kind="m", data=0)),
+                SetAttribute(Attribute.BOLD),
+            ],
+        ),
+        (
+            "\033[6;38;5;1;4m",
+            [
+                Unsupported(Token(kind="m", data=6)),
+                _fore(ochre.Ansi256(1)),
+                SetAttribute(Attribute.UNDERLINE),
+            ],
+        ),
+        (
+            "\033[2;3;4H",
+            [SetCursor(CursorMove.to(x=1, y=2)), SetCursor(CursorMove.to(x=3, y=0))],
+        ),
+        ("\033[2;3A", [SetCursor(CursorMove.up(2)), SetCursor(CursorMove.up(3))]),
+        (
+            "\033[2;3J",
+            [SetClear(Clear.SCREEN), Unsupported(Token(kind="J", data=3))],
+        ),
+        ("\033[1;2z", [Unsupported(Token("z", 1)), Unsupported(Token("z", 2))]),
+    ],
+)
+def test_multiple_parameters(text, expected):
+    """Ensure every parameter of an escape is decoded in order."""
+    assert _instr(text) == expected
+
+
 # VT100
 
 
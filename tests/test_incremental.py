@@ -0,0 +1,119 @@
+"""Tests for the IncrementalAnsi class."""
+
+from __future__ import annotations
+
+from typing import Text
+from unittest import mock
+
+import pytest
+from hypothesis import assume, given
+from hypothesis import strategies as st
+
+from stransi import Ansi, Escape
+from stransi.incremental import IncrementalAnsi
+from stransi.style import DEFAULT
+
+TEXTS = st.text(alphabet="\N{ESC}[;0123mHKx", max_size=40)
+
+
+@st.composite
+def _edits(draw, text: Text):
+    length = len(text)
+    edits = []
+    for _ in range(draw(st.integers(min_value=1, max_value=5))):
+        start = draw(st.integers(min_value=0, max_value=length))
+        end = draw(st.integers(min_value=start, max_value=length))
+        replacement = draw(TEXTS)
+        edits.append((start, end, replacement))
+        length += len(replacement) - (end - start)
+    return edits
+
+
+def _runs(text: Text):
+    style = DEFAULT
+    for item in Ansi(text).instructions():
+        if isinstance(item, str):
+            yield style, item
+            continue
+        style = style.apply(item)
+
+
+def _parses(text: Text) -> bool:
+    # Text that starts like an escape is treated as one by Ansi and might not
+    # be decodable.
+    try:
+        list(Ansi(text).instructions())
+    except ValueError:
+        return False
+    return True
+
+
+def _check(incremental: IncrementalAnsi, text: Text):
+    assert incremental.text == text
+    assert list(incremental.escapes()) == list(Ansi(text).escapes())
+    assert list(incremental.instructions()) == list(Ansi(text).instructions())
+    assert list(incremental.runs()) == list(_runs(text))
+
+
+def test_edit_completes_escape():
+    """Edits can turn text into escapes and back."""
+    incremental = IncrementalAnsi("a\x1b[1;Hello")
+    _check(incremental, "a\x1b[1;Hello")
+    incremental.edit(4, 5, "m")
+    _check(incremental, "a\x1b[1mHello")
+    incremental.edit(4, 5, "")
+    _check(incremental, "a\x1b[1Hello")
+    incremental.edit(0, 1, "\x1b[")
+    _check(incremental, "\x1b[\x1b[1Hello")
+
+
+def test_edit_updates_downstream_styles():
+    """Styles after the edit follow the new escapes."""
+    incremental = IncrementalAnsi("\x1b[1mab\x1b[3mcd")
+    incremental.edit(2, 3, "4")
+    _check(incremental, "\x1b[4mab\x1b[3mcd")
+    assert incremental.style_at(len(incremental)) == incremental.style_at(10)
+
+
+def test_edit_rejects_bad_ranges():
+    """Edits must be within the text."""
+    with pytest.raises(IndexError):
+        IncrementalAnsi("abc").edit(2, 4, "")
+
+
+def _edit_and_check(data, text: Text):
+    assume(_parses(text))
+    incremental = IncrementalAnsi(text)
+    _check(incremental, text)
+    for start, end, replacement in data.draw(_edits(text)):
+        text = text[:start] + replacement + text[end:]
+        assume(_parses(text))
+        incremental.edit(start, end, replacement)
+        _check(incremental, text)
+        for offset in range(len(text) + 1):
+            assert incremental.style_at(offset) == _style_at(text, offset)
+
+
+def _style_at(text: Text, offset: int):
+    style = DEFAULT
+    for piece in Ansi(text).escapes():
+        if offset < len(piece):
+            return style
+        offset -= len(piece)
+        if isinstance(piece, Escape):
+            for instruction in piece.instructions():
+                style = style.apply(instruction)
+    return style
+
+
+@given(data=st.data(), text=TEXTS)
+def test_edits_match_full_parse(data, text: Text):
+    """Incremental parses agree with parsing from scratch."""
+    _edit_and_check(data, text)
+
+
+@given(data=st.data(), text=TEXTS)
+def test_edits_match_full_parse_across_blocks(data, text: Text):
+    """Edits that span several blocks agree with parsing from scratch too."""
+    with mock.patch("stransi.incremental._BLOCK_SIZE", 1):
+        _edit_and_check(data, text)
@@ -0,0 +1,85 @@
+"""Tests for the LineIndex class."""
+
+from __future__ import annotations
+
+import io
+
+import pytest
+from hypothesis import given
+from hypothesis import strategies as st
+
+from stransi import Ansi
+from stransi.index import LineIndex
+from stransi.style import DEFAULT
+
+LOG = (
+    "plain\n"
+    "\x1b[1mbold\n"
+    "bold \x1b[31mand red\r\n"
+    "still bold and red\x1b[22m\n"
+    "red \N{CJK UNIFIED IDEOGRAPH-4E2D}\n"
+    "\x1b[mplain again"
+).encode()
+
+
+def _style(text):
+    style = DEFAULT
+    for item in Ansi(text).instructions():
+        if not isinstance(item, str):
+            style = style.apply(item)
+    return style
+
+
+@pytest.mark.parametrize("every", [1, 2, 3, 10])
+def test_index_renders_lines_on_their_own(every: int):
+    """Lines start in the style that was active before them."""
+    index = LineIndex(io.BytesIO(LOG), every=every)
+    assert len(index) == 6
+    assert index.lines(0, 6) == [
+        "plain",
+        "\x1b[1mbold\x1b[m",
+        "\x1b[1mbold \x1b[31mand red\x1b[m",
+        "\x1b[1;31mstill bold and red\x1b[22m\x1b[m",
+        "\x1b[31mred \N{CJK UNIFIED IDEOGRAPH-4E2D}\x1b[m",
+        "\x1b[31m\x1b[mplain again",
+    ]
+    assert [index.line(n) for n in range(6)] == index.lines(0, 6)
+    assert index.lines(4, 100) == index.lines(0, 6)[4:]
+    assert index.offset(1) == len(b"plain\n")
+
+
+def test_index_rejects_bad_lines():
+    """Lines out of range can't be accessed."""
+    index = LineIndex(io.BytesIO(LOG))
+    with pytest.raises(IndexError):
+        index.style(6)
+    with pytest.raises(ValueError):
+        LineIndex(io.BytesIO(LOG), every=0)
+
+
+@given(
+    lines=st.lists(st.sampled_from(["a", "\x1b[1m", "\x1b[31m", "\x1b[m", "\n"])),
+    every=st.integers(min_value=1, max_value=4),
+)
+def test_index_styles_match_replaying(lines, every: int):
+    """The style of every line is the one replaying gives."""
+    text = "".join(lines)
+    index = LineIndex(io.BytesIO(text.encode()), every=every)
+    starts = text.split("\n")
+    for number in range(len(index)):
+        assert index.style(number) == _style("\n".join(starts[:number]))
+
+
+@pytest.mark.parametrize("every", [1, 2])
+def test_index_skips_undecodable_lines(every: int):
+    """Escapes that can't be decoded are skipped, the rest still apply."""
+    index = LineIndex(
+        io.BytesIO(
+            b"\x1b[1mok\n\x1b[?25lprogress\x1b[m\nplain\n\x1b[?25h\x1b[31mred\nx\n"
+        ),
+        every=every,
+    )
+    assert len(index) == 5
+    assert index.style(1) == _style("\x1b[1m")
+    assert index.style(2) == index.style(3) == DEFAULT
+    assert index.style(4) == _style("\x1b[31m")
@@ -0,0 +1,116 @@
+"""Tests for the Pipeline class."""
+
+from __future__ import annotations
+
+from typing import List, Text
+
+import pytest
+from hypothesis import given
+from hypothesis import strategies as st
+
+from stransi import Ansi, SetAttribute
+from stransi.attribute import Attribute
+from stransi.instruction import Instruction
+from stransi.pipeline import (
+    Callback,
+    Collect,
+    CountUnsupported,
+    Pipeline,
+    Runs,
+    Sink,
+    Strip,
+)
+from stransi.style import DEFAULT
+
+TEXTS = st.text(alphabet="\N{ESC}[;01mHab", max_size=40)
+
+
+def _parses(text: Text) -> bool:
+    try:
+        list(Ansi(text).instructions())
+    except ValueError:
+        return False
+    return True
+
+
+def _merged(items: List[Instruction | Text]) -> List[Instruction | Text]:
+    """Join consecutive pieces of text."""
+    merged: List[Instruction | Text] = []
+    for item in items:
+        if isinstance(item, str) and merged and isinstance(merged[-1], str):
+            merged[-1] += item
+        else:
+            merged.append(item)
+    return merged
+
+
+def test_pipeline_feeds_every_sink():
+    """Every sink gets the result of a single parse."""
+    text = "\x1b[1mHello\x1b[6m, \x1b[1mworld\x1b[m!\x1b[s?"
+    batches: List[int] = []
+    strip, runs, counts, collect = Pipeline(
+        Strip(),
+        Runs(),
+        CountUnsupported(),
+        Collect(),
+        Callback(lambda batch: batches.append(len(batch))),
+        batch_size=3,
+    ).run(text)[:4]
+
+    assert strip == "Hello, world!?"
+    bold = DEFAULT.apply(next(iter(Ansi("\x1b[1m").instructions())))
+    assert runs == [(bold, "Hello, world"), (DEFAULT, "!?")]
+    assert counts == {("m", 6): 1, ("s", 0): 1}
+    assert collect == list(Ansi(text).instructions())
+    assert batches == [3, 3, 3, 1]
+
+
+def test_pipeline_rejects_bad_batch_sizes():
+    """Batches can't be empty."""
+    with pytest.raises(ValueError):
+        Pipeline(batch_size=0)
+
+
+@given(text=TEXTS, cuts=st.lists(st.integers(min_value=0, max_value=40)))
+def test_pipeline_chunks_match_whole_parse(text: Text, cuts: List[int]):
+    """Feeding text in chunks gives the same items as parsing it whole."""
+    pipeline = Pipeline(Collect(), batch_size=2)
+    previous = 0
+    for cut in sorted(cuts):
+        pipeline.feed(text[previous:cut])
+        previous = max(previous, cut)
+    pipeline.feed(text[previous:])
+
+    try:
+        expected = list(Ansi(text).instructions())
+    except ValueError:
+        with pytest.raises(ValueError):
+            pipeline.close()
+        return
+    assert [_merged(items) for items in pipeline.close()] == [expected]
+
+
+def test_pipeline_streams_text():
+    """Text reaches the sinks as soon as it can't be part of an escape."""
+    collect = Collect()
+    pipeline = Pipeline(collect, batch_size=1)
+    for line in ["plain\n", "more\x1b[", "1mtext\x1b", "x"]:
+        pipeline.feed(line)
+    assert collect.items == [
+        "plain\n",
+        "more",
+        SetAttribute(Attribute.BOLD),
+        "text",
+        "\x1bx",
+    ]
+    # Text that looks like an escape is held back until it is complete.
+    pipeline.feed("\x1b[m\x1b[?25lhidden")
+    assert collect.items[-1] == SetAttribute(Attribute.NORMAL)
+    with pytest.raises(ValueError):
+        pipeline.close()
+
+
+def test_sinks_must_feed():
+    """Sinks have to implement `feed()`."""
+    with pytest.raises(TypeError):
+        Sink()  # type: ignore[abstract]
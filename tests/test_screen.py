@@ -0,0 +1,105 @@
+"""Tests for screen differences."""
+
+from __future__ import annotations
+
+from typing import List, Text
+
+from hypothesis import given
+from hypothesis import strategies as st
+
+from stransi import Ansi, SetClear, SetCursor
+from stransi.clear import Clear
+from stransi.screen import Cell, Screen, diff, render
+from stransi.style import DEFAULT
+
+LINES = st.lists(
+    st.text(alphabet="ab中\N{COMBINING ACUTE ACCENT}", max_size=12).map(
+        lambda text: f"\x1b[1m{text}" if "b" in text else text
+    ),
+    max_size=5,
+)
+
+
+def _emulate(screen: Screen, text: Text) -> Screen:  # noqa: C901
+    """Apply an ANSI string to a screen, like a (very simple) terminal would."""
+    rows: List[List[Cell]] = [list(line) for line in screen.lines]
+    row = column = 0
+    style = DEFAULT
+    for item in Ansi(text).instructions():
+        if isinstance(item, SetCursor):
+            if item.move.relative:
+                row, column = row + item.move.y, column + item.move.x
+            else:
+                row, column = item.move.y, item.move.x
+        elif isinstance(item, SetClear):
+            assert item.region in {Clear.LINE_AFTER, Clear.SCREEN_AFTER}
+            del rows[row][column:]
+            if item.region is Clear.SCREEN_AFTER:
+                del rows[row + 1 :]  # noqa: E203
+        elif isinstance(item, str):
+            for index, piece in enumerate(item.split("\r")):
+                if index:
+                    column = 0
+                line = Screen.from_instructions([*style.instructions(), piece])
+                cells = line.lines[0]
+                while len(rows) <= row:
+                    rows.append([])
+                rows[row][column : column + len(cells)] = cells  # noqa: E203
+                column += len(cells)
+        else:
+            style = style.apply(item)
+    assert style == DEFAULT
+    return Screen(tuple(tuple(line) for line in rows))
+
+
+def _trim(screen: Screen) -> Screen:
+    """Remove trailing empty lines, which a terminal can't tell apart."""
+    lines = list(screen.lines)
+    while lines and not lines[-1]:
+        lines.pop()
+    return Screen(tuple(lines))
+
+
+def test_screen_from_ansi():
+    """Screens are made of styled cells."""
+    bold = DEFAULT.apply(Ansi("\x1b[1m").instructions().__next__())
+    assert Screen.from_ansi("a\x1b[1m中\nb\N{COMBINING ACUTE ACCENT}").lines == (
+        (("a", DEFAULT), ("中", bold), ("", bold)),
+        (("b\N{COMBINING ACUTE ACCENT}", bold),),
+    )
+
+
+def test_diff_of_equal_screens_is_empty():
+    """Nothing is written when nothing changed."""
+    screen = Screen.from_ansi("\x1b[1mHello\x1b[m\nworld")
+    assert diff(screen, screen) == []
+
+
+def test_diff_writes_only_changes():
+    """Only what changed is written."""
+    old = Screen.from_ansi("Hello, world!\nsecond line\nthird line")
+    new = Screen.from_ansi("Hello, world?\nsecond line\nthird\x1b[31m line\x1b[m")
+    assert render(old, new) == "\x1b[H\x1b[12C?\x1b[2B\r\x1b[5C\x1b[31m line\x1b[m"
+
+
+def test_diff_rewrites_short_gaps():
+    """Short unchanged gaps are rewritten instead of moved over."""
+    assert render(Screen.from_ansi("abcdef"), Screen.from_ansi("xbcyef")) == (
+        "\x1b[Hxbcy"
+    )
+
+
+def test_diff_clears_what_is_gone():
+    """Lines and screens are cleared in the default style."""
+    old = Screen.from_ansi("Hello\nworld\nagain")
+    new = Screen.from_ansi("\x1b[41mHel")
+    assert render(old, new) == "\x1b[H\x1b[41mHel\x1b[m\x1b[K\x1b[B\r\x1b[J"
+
+
+@given(old=LINES, new=LINES)
+def test_diff_changes_screens(old: List[Text], new: List[Text]):
+    """Applying a difference to a screen gives the other screen."""
+    old_screen = Screen.from_ansi("\n".join(old))
+    new_screen = Screen.from_ansi("\n".join(new))
+    rendered = _emulate(old_screen, render(old_screen, new_screen))
+    assert _trim(rendered) == _trim(new_screen)
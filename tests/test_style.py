@@ -0,0 +1,68 @@
+"""Tests for the Style class."""
+
+from __future__ import annotations
+
+import ochre
+from hypothesis import given
+from hypothesis import strategies as st
+
+from stransi import Ansi, SetAttribute, SetColor
+from stransi.attribute import Attribute
+from stransi.color import ColorRole
+from stransi.style import DEFAULT, Style
+
+ATTRIBUTES = st.sampled_from(list(Attribute))
+COLORS = st.one_of(
+    st.none(),
+    st.builds(ochre.Ansi256, st.integers(min_value=0, max_value=255)),
+)
+INSTRUCTIONS = st.one_of(
+    st.builds(SetAttribute, ATTRIBUTES),
+    st.builds(SetColor, st.sampled_from(list(ColorRole)), COLORS),
+)
+STYLES = st.lists(INSTRUCTIONS).map(lambda instructions: _style(instructions))
+
+
+def _style(instructions) -> Style:
+    style = DEFAULT
+    for instruction in instructions:
+        style = style.apply(instruction)
+    return style
+
+
+def test_default_style_is_falsy():
+    """Only the default style is falsy."""
+    assert not Style()
+    assert Style(frozenset({Attribute.BOLD}))
+    assert Style(foreground=ochre.Ansi256(0))
+
+
+def test_style_applies_instructions():
+    """Styles accumulate SGR instructions."""
+    style = _style(Ansi("\x1b[1;2;3;31;44m\x1b[22;23m").instructions())
+    assert style == Style(foreground=ochre.Ansi256(1), background=ochre.Ansi256(4))
+    assert _style(Ansi("\x1b[1;31m\x1b[m").instructions()) == DEFAULT
+
+
+def test_style_compares_colors_by_encoding():
+    """Colors that look the same but are written differently differ."""
+    red = ochre.Ansi256(9)
+    assert Style(foreground=red) != Style(foreground=red.rgb)
+    assert Style(foreground=red) != Style(background=red)
+    assert Style(foreground=red) == Style(foreground=ochre.Ansi256(9))
+
+
+def test_style_turns_off_intensity():
+    """Bold or dim alone can only be turned off through a common reset."""
+    both = Style(frozenset({Attribute.BOLD, Attribute.DIM}))
+    dim = Style(frozenset({Attribute.DIM}))
+    assert _style([*both.instructions(), *both.transition(dim)]) == dim
+
+
+@given(source=STYLES, target=STYLES)
+def test_style_transitions(source: Style, target: Style):
+    """Transitions change a style into another."""
+    assert _style([*source.instructions(), *source.transition(target)]) == target
+    assert _style(Ansi(source.escape() + target.escape(source)).instructions()) == (
+        target
+    )
@@ -0,0 +1,112 @@
+"""
+Tests of parsing from several threads at once.
+
+Parsing must give the same results from any number of threads. Without the
+global interpreter lock, it must also scale: parsing from N threads must be at
+least `STRANSI_SCALING_THRESHOLD` (a fraction of N, 0.7 by default) times as
+fast as from a single thread.
+
+The scaling test is unverified: it is skipped where the global interpreter
+lock is enabled (or there are fewer CPUs than threads), and it has never run
+on a free-threaded build.
+"""
+
+from __future__ import annotations
+
+import gc
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from threading import Barrier
+from typing import Callable, List, Text
+
+import pytest
+
+from stransi import Ansi
+from stransi._misc import _char_width, _ThreadCache, _width
+
+from .test_equivalence import CORPORA
+
+# Minimum speedup with N threads, as a fraction of N
+THRESHOLD = float(os.environ.get("STRANSI_SCALING_THRESHOLD", "0.7"))
+THREADS = 4
+REPEATS = 5
+
+TEXT = CORPORA["sgr"] + CORPORA["mixed"] + "中文 ünïcödé " * 200
+
+
+def _parse(text: Text) -> List[Text]:
+    """Parse text completely, the way most users do."""
+    return [repr(item) for item in Ansi(text).instructions()]
+
+
+def _run(threads: int, task: Callable[[], object]) -> List[object]:
+    """Run a task in many threads, all starting at the same time."""
+    barrier = Barrier(threads)
+
+    def start() -> object:
+        barrier.wait()
+        return task()
+
+    with ThreadPoolExecutor(threads) as executor:
+        futures = [executor.submit(start) for _ in range(threads)]
+        return [future.result() for future in futures]
+
+
+def _gil_enabled() -> bool:
+    """Return True if the global interpreter lock is enabled."""
+    return getattr(sys, "_is_gil_enabled", lambda: True)()
+
+
+def test_threads_parse_the_same():
+    """Parsing from many threads gives the same result as from one."""
+    expected = (_parse(TEXT), _width(TEXT), Ansi(TEXT).wrap(30))
+    results = _run(8, lambda: (_parse(TEXT), _width(TEXT), Ansi(TEXT).wrap(30)))
+    assert all(result == expected for result in results)
+
+
+def test_thread_caches_merge_statistics():
+    """Every thread has its own cache, and their statistics add up."""
+    _char_width.cache_clear()
+    _width("中文")
+    barrier = Barrier(4)
+
+    def task() -> object:
+        _width("中文")
+        # Statistics only cover the threads that are still alive.
+        barrier.wait()
+        return _char_width.cache_info()
+
+    for info in _run(4, task):
+        assert info.misses >= 4 * 2
+        assert info.currsize >= 4 * 2
+
+
+def test_thread_caches_go_away_with_threads():
+    """The caches of threads that are done are dropped, along with their stats."""
+    square = _ThreadCache(lambda x: x * x, maxsize=8)
+    assert square(3) == 9
+    assert _run(4, lambda: square(4)) == [16] * 4
+    gc.collect()
+    assert square.cache_info() == (0, 1, 8, 1)
+    square.cache_clear()
+    assert square.cache_info() == (0, 0, 8, 0)
+
+
+@pytest.mark.skipif(_gil_enabled(), reason="threads can't run in parallel")
+@pytest.mark.skipif((os.cpu_count() or 1) < THREADS, reason="not enough CPUs")
+def test_parsing_scales_with_threads():
+    """Parsing from many threads is nearly as many times faster."""
+
+    def best_time(threads: int) -> float:
+        times = []
+        for _ in range(REPEATS):
+            start = time.perf_counter()
+            # The same total amount of work, split among the threads
+            _run(threads, lambda: [_parse(TEXT) for _ in range(THREADS // threads)])
+            times.append(time.perf_counter() - start)
+        return min(times)
+
+    speedup = best_time(1) / best_time(THREADS)
+    assert speedup >= THREADS * THRESHOLD
@@ -0,0 +1,93 @@
+"""Tests for transformations of the visible text of ANSI strings."""
+
+from __future__ import annotations
+
+import re
+from typing import List, Text
+
+from hypothesis import given
+from hypothesis import strategies as st
+
+from stransi.transform import _ESCAPE, Stream, Substitution, sub, transform
+
+TEXTS = st.lists(
+    st.one_of(
+        st.sampled_from(
+            ["\x1b[1m", "\x1b[31m", "\x1b[m", "\x1b[2J", "\x1b[?25l", "\n"]
+        ),
+        st.text(alphabet="ab \x1b[", max_size=5),
+    ),
+    max_size=20,
+).map("".join)
+
+
+def _escapes(text: Text) -> List[Text]:
+    """Return the escape sequences of a text."""
+    return _ESCAPE.findall(text)
+
+
+def _strip(text: Text) -> Text:
+    """Return the visible text of a text."""
+    return _ESCAPE.sub("", text)
+
+
+@given(text=TEXTS, count=st.integers(min_value=0, max_value=3))
+def test_sub_only_changes_visible_text(text: Text, count: int):
+    """Substitutions match across escapes and keep all of them."""
+    upper = lambda match: match.group().upper()  # noqa: E731
+    result = sub(r"a+ ?b", upper, text, count)
+    assert _strip(result) == re.sub(r"a+ ?b", upper, _strip(text), count)
+    assert _escapes(result) == _escapes(text)
+
+
+def test_sub_keeps_styles_around_matches():
+    """Replacements take the style of the start of their match."""
+    text = "\x1b[1mab\x1b[31mcd\x1b[mef"
+    assert sub("bcd", "X", text) == "\x1b[1maX\x1b[31m\x1b[mef"
+    assert sub("^", ">", text) == "\x1b[1m>ab\x1b[31mcd\x1b[mef"
+    assert sub("$", "<", text) == "\x1b[1mab\x1b[31mcd\x1b[mef<"
+    assert sub(r"(\w)f", r"\1\1", text) == "\x1b[1mab\x1b[31mcd\x1b[mee"
+
+
+def test_substitution_counts_across_texts():
+    """The count limits the substitutions of every text put together."""
+    substitution = Substitution("a", "b", count=3)
+    assert substitution("aa") == "bb"
+    assert substitution("\x1b[1maa") == "\x1b[1mba"
+    assert substitution("aa") == "aa"
+
+
+def test_transformations_keep_other_escapes():
+    """Escapes that aren't supported are never taken as visible text."""
+    assert transform(str.upper, "\x1b[?25lhi\x1b[?25h") == "\x1b[?25lHI\x1b[?25h"
+    assert sub("l", "L", "\x1b[?25lhello") == "\x1b[?25lheLLo"
+    assert sub("5l", "!", "\x1b[?25l5l") == "\x1b[?25l!"
+
+
+def test_transform_applies_to_text_pieces():
+    """Functions are applied to every piece of text between escapes."""
+    pieces: List[Text] = []
+    result = transform(
+        lambda piece: pieces.append(piece) or piece[::-1], "ab\x1b[1mcd\x1b[mef"
+    )
+    assert result == "ba\x1b[1mdc\x1b[mfe"
+    assert pieces == ["ab", "cd", "ef"]
+
+
+@given(text=TEXTS, cuts=st.lists(st.integers(min_value=0, max_value=100)))
+def test_stream_matches_whole_lines(text: Text, cuts: List[int]):
+    """Streaming gives the same result, however the text is cut."""
+    stream = Stream(Substitution(r"a[^\n]*b", "<\\g<0>>"))
+    previous = 0
+    output = []
+    for cut in sorted(cuts) + [len(text)]:
+        output.append(stream.feed(text[previous:cut]))
+        previous = max(previous, cut)
+    output.append(stream.close())
+    assert "".join(output) == sub(r"a[^\n]*b", "<\\g<0>>", text)
+
+
+def test_stream_rewrites_chunks():
+    """Chunks are transformed as soon as they contain a line break."""
+    stream = Stream(lambda text: text.upper())
+    assert list(stream.rewrite(["a", "b\nc", "d\n", "e"])) == ["AB\n", "CD\n", "E"]
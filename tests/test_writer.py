@@ -0,0 +1,129 @@
+"""Tests for the Writer class."""
+
+from __future__ import annotations
+
+import io
+from typing import List, Text
+
+import ochre
+import pytest
+from hypothesis import given
+from hypothesis import strategies as st
+
+from stransi import Ansi, SetAttribute, SetColor
+from stransi.attribute import Attribute
+from stransi.color import ColorRole
+from stransi.screen import Screen
+from stransi.style import Style
+from stransi.writer import Writer
+
+FRAGMENTS = st.lists(
+    st.lists(
+        st.one_of(
+            st.sampled_from(["\x1b[1m", "\x1b[22m", "\x1b[31m", "\x1b[m", "\x1b[2K"]),
+            st.text(alphabet="ab\n", max_size=3),
+        ),
+        max_size=5,
+    ).map("".join),
+    max_size=10,
+)
+
+
+class _Stream(io.StringIO):
+    """A text stream that records every write."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.writes: List[Text] = []
+
+    def write(self, text: Text) -> int:
+        self.writes.append(text)
+        return super().write(text)
+
+
+@given(fragments=FRAGMENTS)
+def test_writer_keeps_what_is_shown(fragments: List[Text]):
+    """The text ends up in the same styles, and in the default one after all."""
+    stream = io.StringIO()
+    with Writer(stream, buffer_size=4) as writer:
+        for fragment in fragments:
+            writer.write(fragment)
+
+    expected = "".join(fragments)
+    assert Screen.from_ansi(stream.getvalue()) == Screen.from_ansi(expected)
+    assert not writer.style
+
+
+def test_writer_skips_redundant_escapes():
+    """Escapes that don't change the style are not written."""
+    stream = io.StringIO()
+    with Writer(stream) as writer:
+        for word in ["one", "two"]:
+            writer.write(f"\x1b[1;31m{word}\x1b[m")
+        writer.write("\x1b[1m\x1b[m\x1b[32m\x1b[39m three")
+    assert stream.getvalue() == "\x1b[1;31monetwo\x1b[m three"
+
+
+def test_writer_accepts_instructions_and_styles():
+    """Instructions and styles can be written too."""
+    stream = io.StringIO()
+    with Writer(stream) as writer:
+        writer.write(SetAttribute(Attribute.BOLD))
+        writer.write(["bold", SetColor(ColorRole.FOREGROUND, ochre.Ansi256(1))])
+        writer.write("red")
+        writer.set_style(Style(frozenset({Attribute.BOLD})))
+        writer.write(Ansi("\x1b[2Kbold"))
+    assert stream.getvalue() == "\x1b[1mbold\x1b[31mred\x1b[39m\x1b[2Kbold\x1b[m"
+
+
+def test_writer_keeps_unsupported_sgr_together():
+    """Unsupported SGR parameters are not written as supported ones."""
+    stream = io.StringIO()
+    with Writer(stream) as writer:
+        writer.write("\x1b[38;5mhi\x1b[1;38m\x1b[6mthere")
+    assert list(Ansi(stream.getvalue()).instructions())[:2] == list(
+        Ansi("\x1b[38;5m").instructions()
+    )
+    assert "\x1b[5m" not in stream.getvalue()
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("\x1b[1;9mA\x1b[22mB", "\x1b[1m\x1b[9mA\x1b[22mB\x1b[m"),
+        ("\x1b[9m\x1b[31mA\x1b[1;39mB", "\x1b[9m\x1b[31mA\x1b[1;39mB\x1b[m"),
+        ("\x1b[9mA\x1b[mB", "\x1b[9mA\x1b[mB"),
+        ("\x1b[9mA\x1b[m\x1b[1mB\x1b[mC", "\x1b[9mA\x1b[;1mB\x1b[mC"),
+    ],
+)
+def test_writer_keeps_unsupported_sgr_active(text: Text, expected: Text):
+    """Style changes don't turn off unsupported SGR parameters, resets do."""
+    stream = io.StringIO()
+    with Writer(stream) as writer:
+        writer.write(text)
+    assert stream.getvalue() == expected
+
+
+def test_writer_buffers_writes():
+    """Writes are buffered until a line break or the buffer is full."""
+    stream = _Stream()
+    writer = Writer(stream, buffer_size=12)
+    writer.write("\x1b[1mabc")
+    writer.write("def")
+    assert stream.writes == []
+    writer.write("g\n")
+    assert stream.writes == ["\x1b[1mabcdefg\n"]
+    writer.write("0123456789ab")
+    assert stream.writes[1:] == ["0123456789ab"]
+
+    writer = Writer(stream, line_buffering=False)
+    writer.write("a\nb\n")
+    assert len(stream.writes) == 2
+    writer.flush()
+    assert stream.writes[2:] == ["a\nb\n"]
+
+
+def test_writer_rejects_bad_buffer_sizes():
+    """The buffer can't be empty."""
+    with pytest.raises(ValueError):
+        Writer(io.StringIO(), buffer_size=0)